@@ -20,7 +20,7 @@ async def get_all_users(db: AsyncSession = Depends(get_async_db)):
         return APIResponse(
             success=True,
             message=f"Retrieved {len(users)} users successfully",
-            data=[UserSchema.from_orm(user) for user in users]
+            data=[UserSchema.model_validate(user) for user in users]
         )
     
     except Exception as e:
@@ -48,7 +48,7 @@ async def create_user(user_data: UserCreate, db: AsyncSession = Depends(get_asyn
         return APIResponse(
             success=True,
             message="User created successfully",
-            data=UserSchema.from_orm(db_user)
+            data=UserSchema.model_validate(db_user)
         )
     
     except Exception as e:
@@ -66,7 +66,7 @@ async def get_user(user_id: int, db: AsyncSession = Depends(get_async_db)):
         return APIResponse(
             success=True,
             message="User retrieved successfully",
-            data=UserSchema.from_orm(user)
+            data=UserSchema.model_validate(user)
         )
     
     except Exception as e:
@@ -81,7 +81,7 @@ async def update_user(user_id: int, user_data: UserUpdate, db: AsyncSession = De
             raise HTTPException(status_code=404, detail="User not found")
         
         # Update only provided fields
-        update_data = user_data.dict(exclude_unset=True)
+        update_data = user_data.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(user, field, value)
         
@@ -91,7 +91,7 @@ async def update_user(user_id: int, user_data: UserUpdate, db: AsyncSession = De
         return APIResponse(
             success=True,
             message="User updated successfully",
-            data=UserSchema.from_orm(user)
+            data=UserSchema.model_validate(user)
         )
     
     except Exception as e:
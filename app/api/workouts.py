@@ -9,7 +9,7 @@ from ..models import User, WorkoutLog
 from ..schemas import WorkoutLogCreate, WorkoutLog as WorkoutLogSchema, WorkoutPlan, APIResponse
 # Removed AI orchestrator dependency - using JSON-based workout plans
 import json
-from ..services.workout_plan_service import WorkoutPlanService
+from ..services.workout_plan_service import workout_plan_service
 
 router = APIRouter(prefix="/workout", tags=["workouts"])
 
@@ -36,7 +36,7 @@ async def get_workout_plan(user_id: int, db: AsyncSession = Depends(get_async_db
         goal_type = user.fitness_goal_type or "building_muscle"
         
         # Initialize workout plan service
-        workout_service = WorkoutPlanService()
+        workout_service = workout_plan_service
         
         try:
             # First, try to get plan from database
@@ -112,7 +112,7 @@ async def get_workout_plan(user_id: int, db: AsyncSession = Depends(get_async_db
             success=True,
             message="Workout plan loaded successfully",
             data={
-                "plan": workout_plan.dict()
+                "plan": workout_plan.model_dump()
             }
         )
     
@@ -145,7 +145,7 @@ async def log_workout(workout_data: WorkoutLogCreate, user_id: int, db: AsyncSes
         return APIResponse(
             success=True,
             message="Workout logged successfully",
-            data=WorkoutLogSchema.from_orm(workout_log)
+            data=WorkoutLogSchema.model_validate(workout_log)
         )
     
     except Exception as e:
@@ -169,7 +169,7 @@ async def get_workout_history(user_id: int, db: AsyncSession = Depends(get_async
         return APIResponse(
             success=True,
             message="Workout history retrieved successfully",
-            data=[WorkoutLogSchema.from_orm(log) for log in workout_logs]
+            data=[WorkoutLogSchema.model_validate(log) for log in workout_logs]
         )
     
     except Exception as e:
@@ -184,10 +184,11 @@ async def discover_workout_plans(
 ):
     """Discover available workout plans with rich metadata for frontend display"""
     try:
-        workout_service = WorkoutPlanService()
+        workout_service = workout_plan_service
         
-        # Get all plans from database
+        # Get all plans and their metadata from database
         db_plans = await workout_service.get_all_plans()
+        meta_by_id = await workout_service.get_all_plan_metadata()
         
         # Get plans from JSON file as fallback
         json_plans = {}
@@ -203,7 +204,7 @@ async def discover_workout_plans(
         # Add database plans (generated plans)
         for plan_id, plan_data in db_plans.items():
             # Get metadata for this plan
-            metadata = await workout_service.get_plan_metadata(plan_id)
+            metadata = meta_by_id.get(plan_id)
             if metadata:
                 all_plans[plan_id] = {
                     "plan_data": plan_data,
@@ -285,7 +286,7 @@ async def discover_workout_plans(
 async def get_plan_categories():
     """Get all available plan categories for frontend filtering"""
     try:
-        workout_service = WorkoutPlanService()
+        workout_service = workout_plan_service
         
         # Get all plans to extract categories
         db_plans = await workout_service.get_all_plans()
@@ -302,8 +303,9 @@ async def get_plan_categories():
         categories = set()
         
         # Add database plan categories
-        for plan_id, plan_data in db_plans.items():
-            metadata = await workout_service.get_plan_metadata(plan_id)
+        meta_by_id = await workout_service.get_all_plan_metadata()
+        for plan_id in db_plans:
+            metadata = meta_by_id.get(plan_id)
             if metadata and metadata["metadata"].get("category"):
                 categories.add(metadata["metadata"]["category"])
         
@@ -335,7 +337,7 @@ async def get_plan_categories():
 async def get_plan_difficulties():
     """Get all available plan difficulties for frontend filtering"""
     try:
-        workout_service = WorkoutPlanService()
+        workout_service = workout_plan_service
         
         # Get all plans to extract difficulties
         db_plans = await workout_service.get_all_plans()
@@ -352,8 +354,9 @@ async def get_plan_difficulties():
         difficulties = set()
         
         # Add database plan difficulties
-        for plan_id, plan_data in db_plans.items():
-            metadata = await workout_service.get_plan_metadata(plan_id)
+        meta_by_id = await workout_service.get_all_plan_metadata()
+        for plan_id in db_plans:
+            metadata = meta_by_id.get(plan_id)
             if metadata and metadata["metadata"].get("difficulty"):
                 difficulties.add(metadata["metadata"]["difficulty"])
         
@@ -8,6 +8,17 @@ class Settings:
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./slate.db")
     DIRECT_URL: str = os.getenv("DIRECT_URL", "")
     
+    # Connection pool (per process). Supabase session mode caps client
+    # connections, so raise these only as far as the plan allows.
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    # Set when DATABASE_URL points at PgBouncer/Supavisor in transaction mode:
+    # the pooler owns the connections, so the app uses NullPool and no
+    # server-side prepared statements
+    DB_PGBOUNCER_TRANSACTION_MODE: bool = os.getenv("DB_PGBOUNCER_TRANSACTION_MODE", "False").lower() == "true"
+    
     # OpenAI
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY")
     
@@ -3,8 +3,11 @@ Database configuration and session management.
 """
 
 import os
+import asyncio
+from uuid import uuid4
 from sqlalchemy import create_engine
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.pool import NullPool
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker, async_scoped_session
 from sqlalchemy.orm import sessionmaker, declarative_base
 from .config import settings
 
@@ -26,6 +29,11 @@ def get_supabase_database_url() -> str:
         cleaned_url = clean_database_url(settings.DATABASE_URL)
         
         if cleaned_url.startswith("postgresql://"):
+            if settings.DB_PGBOUNCER_TRANSACTION_MODE:
+                # Keep the transaction-mode pooler URL as configured
+                cleaned_url = cleaned_url.replace("?pgbouncer=true", "").replace("&pgbouncer=true", "")
+                return cleaned_url.replace("postgresql://", "postgresql+asyncpg://")
+            
             # Convert to asyncpg format
             if ":6543" in cleaned_url:
                 print("🔄 Converting from transaction mode (6543) to session mode (5432)")
@@ -76,23 +84,41 @@ def get_database_url_with_fallback():
 async_database_url = get_database_url_with_fallback()
 print(f"🔧 Final database URL: {async_database_url[:50]}...")
 
-# Async engine optimized for Supabase session mode
+def get_async_engine_options() -> dict:
+    """Engine keyword arguments for the configured pooling mode"""
+    connect_args = {}
+    if "postgresql" in async_database_url:
+        # Optimized settings for Supabase
+        connect_args = {
+            "command_timeout": 60,
+            "server_settings": {
+                "jit": "off"
+            }
+        }
+    
+    if settings.DB_PGBOUNCER_TRANSACTION_MODE:
+        # The external pooler hands out a different backend per transaction,
+        # so neither client-side pooling nor cached prepared statements apply
+        if "postgresql" in async_database_url:
+            connect_args["statement_cache_size"] = 0
+            connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid4()}__"
+        return {"connect_args": connect_args, "poolclass": NullPool}
+    
+    # Connection pooling settings, sized per process via settings
+    return {
+        "connect_args": connect_args,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+        "pool_timeout": settings.DB_POOL_TIMEOUT
+    }
+
+# Async engine optimized for Supabase session mode (or transaction mode, see settings)
 async_engine = create_async_engine(
     async_database_url,
     echo=settings.DEBUG,
-    # Optimized settings for Supabase session mode
-    connect_args={
-        "command_timeout": 60,
-        "server_settings": {
-            "jit": "off"
-        }
-    } if "postgresql" in async_database_url else {},
-    # Connection pooling settings optimized for Supabase
-    pool_size=5,  # Smaller pool for session mode
-    max_overflow=10,
-    pool_recycle=1800,  # Recycle connections more frequently
-    pool_pre_ping=True,
-    pool_timeout=30
+    **get_async_engine_options()
 )
 
 # Sync engine for migrations (using direct connection)
@@ -103,10 +129,19 @@ sync_engine = create_engine(
 )
 
 # Session factories
-AsyncSessionLocal = sessionmaker(
+# expire_on_commit=False keeps loaded attributes usable after commit without
+# another SELECT. Handlers return right after committing, so reading those
+# (possibly stale) values through the same session is acceptable.
+AsyncSessionLocal = async_sessionmaker(
     async_engine, class_=AsyncSession, expire_on_commit=False
 )
 
+# One session per asyncio task (i.e. per request), reused by everything that
+# runs inside that task and released back to the pool by get_async_db
+AsyncScopedSession = async_scoped_session(
+    AsyncSessionLocal, scopefunc=asyncio.current_task
+)
+
 SyncSessionLocal = sessionmaker(
     autocommit=False, autoflush=False, bind=sync_engine
 )
@@ -115,11 +150,11 @@ Base = declarative_base()
 
 # Dependency to get async database session
 async def get_async_db():
-    async with AsyncSessionLocal() as session:
-        try:
-            yield session
-        finally:
-            await session.close()
+    session = AsyncScopedSession()
+    try:
+        yield session
+    finally:
+        await AsyncScopedSession.remove()
 
 # Dependency to get sync database session
 def get_sync_db():
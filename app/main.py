@@ -4,17 +4,41 @@ Slate AI Health Platform - Main Application
 Full production version with database, AI, and all features.
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
 from contextlib import asynccontextmanager
 from sqlalchemy import text
+import logging
 import os
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
 
 from .config import settings
 
+logger = logging.getLogger(__name__)
+
+
+def _start_log_listener() -> tuple[QueueListener, QueueHandler]:
+    """Route root logging through a queue so request handlers never block on stderr."""
+    log_queue = SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(
+        logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    )
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+
+    root = logging.getLogger()
+    queue_handler = QueueHandler(log_queue)
+    root.addHandler(queue_handler)
+    root.setLevel(logging.DEBUG if settings.DEBUG else logging.INFO)
+    listener.start()
+    return listener, queue_handler
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
+    log_listener, log_handler = _start_log_listener()
     print("🚀 Starting Slate AI Health Platform...")
     print(f"🌍 Environment: {settings.RAILWAY_ENVIRONMENT}")
     print(f"🔧 Debug mode: {settings.DEBUG}")
@@ -60,13 +84,16 @@ async def lifespan(app: FastAPI):
     yield
     
     print("🛑 Shutting down Slate AI Health Platform...")
+    logging.getLogger().removeHandler(log_handler)
+    log_listener.stop()
 
 # Create FastAPI app
 app = FastAPI(
     title="Slate AI Health Platform",
     description="Personalized fitness and nutrition coaching platform",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware with production-ready settings
@@ -78,6 +105,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(Exception)
+async def unhandled_exception_handler(request: Request, exc: Exception):
+    """Log unexpected errors with their traceback and return a generic 500"""
+    logger.exception("Unhandled error on %s %s", request.method, request.url.path)
+    return JSONResponse(status_code=500, content={"detail": "Internal server error"})
+
 # Include routers (but don't fail if they don't load)
 print("🔍 Loading API routers...")
 
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, JSON, ForeignKey, Boolean, Date
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, JSON, ForeignKey, Boolean, Date, UniqueConstraint
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, expression
 from .database import Base
 from datetime import datetime
 
@@ -12,19 +12,24 @@ class User(Base):
     # Authentication fields
     supabase_user_id = Column(String, unique=True, nullable=True, index=True)  # For OAuth providers
     email = Column(String, unique=True, nullable=True, index=True)  # For email authentication
-    email_verified = Column(Boolean, default=False)  # Email verification status
+    email_verified = Column(Boolean, server_default=expression.false())  # Email verification status
     
     # Profile fields (matching the actual database schema)
+    # Server defaults cover sign-ups (e.g. Apple Sign-In) that don't collect a profile yet
     name = Column(String, nullable=False)
-    age = Column(Integer, nullable=False)
-    weight = Column(Float, nullable=False)  # in kg
-    height = Column(Float, nullable=False)  # in cm
-    fitness_goals = Column(Text, nullable=False)  # JSON string of goals
-    fitness_goal_type = Column(String, nullable=False)  # e.g., "building_muscle", "weight_loss", "strength", "endurance"
-    injuries_limitations = Column(Text, nullable=True)
+    age = Column(Integer, nullable=False, server_default="25")
+    weight = Column(Float, nullable=False, server_default="70.0")  # in kg
+    height = Column(Float, nullable=False, server_default="170.0")  # in cm
+    fitness_goals = Column(Text, nullable=False, server_default="Building Muscle")  # JSON string of goals
+    fitness_goal_type = Column(String, nullable=False, server_default="building_muscle")  # e.g., "building_muscle", "weight_loss", "strength", "endurance"
+    injuries_limitations = Column(Text, nullable=True, server_default="None")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
+    # Fetch server-generated timestamps in the INSERT/UPDATE itself (RETURNING)
+    # so handlers don't need a refresh() round-trip after commit
+    __mapper_args__ = {"eager_defaults": True}
+    
     # Relationships
     workout_logs = relationship("WorkoutLog", back_populates="user")
     meal_plans = relationship("MealPlan", back_populates="user")
@@ -58,11 +63,18 @@ class WorkoutPlan(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
+    # Fetch server-generated timestamps with the INSERT itself (RETURNING)
+    __mapper_args__ = {"eager_defaults": True}
+    
     # Relationships
     user = relationship("User", back_populates="workout_plans")
 
 class ExerciseRecord(Base):
     __tablename__ = "exercise_records"
+    __table_args__ = (
+        # One record per exercise per user; lets inserts dedupe with ON CONFLICT
+        UniqueConstraint("user_id", "exercise_name", name="uq_exercise_records_user_exercise"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
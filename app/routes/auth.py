@@ -518,12 +518,14 @@ async def reset_password(
 
 @router.post("/signout")
 async def sign_out(
+    authorization: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user),
     auth_service: SupabaseAuthService = Depends(get_auth_service)
 ):
     """Sign out user"""
     try:
-        await auth_service.sign_out("")  # Token will be handled by Supabase client
+        token = authorization.replace("Bearer ", "") if authorization else ""
+        await auth_service.sign_out(token)
         
         return APIResponse(
             success=True,
@@ -414,7 +414,7 @@ async def log_meal(meal_data: MealPlanCreate, user_id: int, db: AsyncSession = D
         return APIResponse(
             success=True,
             message="Meal logged successfully",
-            data=MealPlanSchema.from_orm(meal_log)
+            data=MealPlanSchema.model_validate(meal_log)
         )
     
     except Exception as e:
@@ -438,7 +438,7 @@ async def get_meal_history(user_id: int, db: AsyncSession = Depends(get_async_db
         return APIResponse(
             success=True,
             message="Meal history retrieved successfully",
-            data=[MealPlanSchema.from_orm(log) for log in meal_logs]
+            data=[MealPlanSchema.model_validate(log) for log in meal_logs]
         )
     
     except Exception as e:
@@ -1,26 +1,47 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 from ..database import get_sync_db, get_async_db
 from ..models import User
 from ..schemas import UserCreate, UserUpdate, User as UserSchema, APIResponse
-from sqlalchemy import select
+from ..utils.orjson_route import ORJSONRoute
+from sqlalchemy import select, lambda_stmt, bindparam
+from sqlalchemy.exc import SQLAlchemyError
 import json
 
-router = APIRouter(tags=["users"])
+router = APIRouter(tags=["users"], route_class=ORJSONRoute)
+
+# Apple Sign-In lookup, built once so SQLAlchemy caches its compiled form
+# across logins instead of recompiling the SELECT on every request
+_lookup_apple_user = lambda_stmt(
+    lambda: select(User).where(User.supabase_user_id == bindparam("sid"))
+)
 
 @router.get("/", response_model=APIResponse)
-async def get_all_users(db: AsyncSession = Depends(get_async_db)):
-    """Get all user profiles"""
+async def get_all_users(
+    limit: int = Query(50, ge=1, le=200),
+    after_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get a page of user profiles, ordered by ID
+    
+    Uses keyset pagination: pass the ID of the last user on the previous
+    page as `after_id` to fetch the next one. This keeps each request bounded
+    to `limit` rows instead of scanning past an OFFSET.
+    """
     try:
-        result = await db.execute(select(User))
+        query = select(User).order_by(User.id).limit(limit)
+        if after_id is not None:
+            query = query.where(User.id > after_id)
+        
+        result = await db.execute(query)
         users = result.scalars().all()
         
         return APIResponse(
             success=True,
             message=f"Retrieved {len(users)} users successfully",
-            data=[UserSchema.from_orm(user) for user in users]
+            data=[UserSchema.model_validate(user) for user in users]
         )
     
     except Exception as e:
@@ -31,12 +52,8 @@ async def create_user(user_data: UserCreate, db: AsyncSession = Depends(get_asyn
     """Create a new user profile"""
     try:
         # Create new user with authentication fields
+        # Authentication fields are left unset (NULL / server default)
         db_user = User(
-            # Authentication fields (set to None for regular user creation)
-            supabase_user_id=None,
-            email=None,
-            email_verified=False,
-            # Profile fields
             name=user_data.name,
             age=user_data.age,
             weight=user_data.weight,
@@ -48,12 +65,11 @@ async def create_user(user_data: UserCreate, db: AsyncSession = Depends(get_asyn
         
         db.add(db_user)
         await db.commit()
-        await db.refresh(db_user)
         
         return APIResponse(
             success=True,
             message="User created successfully",
-            data=UserSchema.from_orm(db_user)
+            data=UserSchema.model_validate(db_user)
         )
     
     except Exception as e:
@@ -75,15 +91,13 @@ async def create_apple_user(user_data: dict, db: AsyncSession = Depends(get_asyn
         print(f"🍎 Extracted data - ID: {supabase_user_id}, Email: {email}, Name: {name}")
         
         # Check if user already exists
-        existing_user = await db.execute(
-            select(User).where(User.supabase_user_id == supabase_user_id)
-        )
+        existing_user = await db.execute(_lookup_apple_user, {"sid": supabase_user_id})
         existing_user = existing_user.scalar_one_or_none()
         
         if existing_user:
             print(f"🍎 Found existing user with ID: {existing_user.id}")
             # Return existing user
-            user_dict = UserSchema.from_orm(existing_user).dict()
+            user_dict = UserSchema.model_validate(existing_user).model_dump()
             response = {
                 "user": user_dict,
                 "access_token": "apple_auth_token"  # Placeholder token
@@ -98,25 +112,19 @@ async def create_apple_user(user_data: dict, db: AsyncSession = Depends(get_asyn
             supabase_user_id=supabase_user_id,
             email=email if email else None,
             email_verified=user_data.get("email_verified", True),
-            name=name,
-            age=25,  # Default age for Apple Sign-In users
-            weight=70.0,  # Default weight in kg
-            height=170.0,  # Default height in cm
-            fitness_goals="Building Muscle",  # Default goal
-            fitness_goal_type="building_muscle",  # Default goal type
-            injuries_limitations="None"  # Default to no injuries
+            name=name
+            # Profile fields fall back to the column server defaults
         )
         
         print(f"🍎 Created User object: {db_user}")
         
         db.add(db_user)
         await db.commit()
-        await db.refresh(db_user)
         
         print(f"🍎 User saved to database with ID: {db_user.id}")
         
         # Convert to dict for response
-        user_dict = UserSchema.from_orm(db_user).dict()
+        user_dict = UserSchema.model_validate(db_user).model_dump()
         print(f"🍎 User dict: {user_dict}")
         
         # Return format expected by iOS app
@@ -134,21 +142,40 @@ async def create_apple_user(user_data: dict, db: AsyncSession = Depends(get_asyn
         await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+def _user_etag(user: User) -> str:
+    """Weak ETag for a user profile, derived from its last modification time"""
+    modified = user.updated_at or user.created_at
+    # Microsecond resolution, so two updates within one second still differ
+    version = round(modified.timestamp() * 1_000_000) if modified else 0
+    return f'W/"{user.id}-{version}"'
+
 @router.get("/{user_id}", response_model=APIResponse)
-async def get_user(user_id: int, db: AsyncSession = Depends(get_async_db)):
-    """Get user profile by ID"""
+async def get_user(user_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    """Get user profile by ID
+    
+    Responds with 304 Not Modified when the client's If-None-Match header
+    matches the current ETag, skipping serialization entirely.
+    """
     try:
         user = await db.get(User, user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
+        etag = _user_etag(user)
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag in (tag.strip() for tag in if_none_match.split(",")):
+            return Response(status_code=304, headers={"ETag": etag})
+        
+        response.headers["ETag"] = etag
         return APIResponse(
             success=True,
             message="User retrieved successfully",
-            data=UserSchema.from_orm(user)
+            data=UserSchema.model_validate(user)
         )
     
-    except Exception as e:
+    except HTTPException:
+        raise
+    except SQLAlchemyError as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.put("/{user_id}", response_model=APIResponse)
@@ -160,19 +187,19 @@ async def update_user(user_id: int, user_data: UserUpdate, db: AsyncSession = De
             raise HTTPException(status_code=404, detail="User not found")
         
         # Update only provided fields
-        update_data = user_data.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(user, field, value)
+        for field in user_data.model_fields_set:
+            setattr(user, field, getattr(user_data, field))
         
         await db.commit()
-        await db.refresh(user)
         
         return APIResponse(
             success=True,
             message="User updated successfully",
-            data=UserSchema.from_orm(user)
+            data=UserSchema.model_validate(user)
         )
     
-    except Exception as e:
+    except HTTPException:
+        raise
+    except SQLAlchemyError as e:
         await db.rollback()
         raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
@@ -4,25 +4,209 @@ Workout Routes
 Handles workout plan generation, exercise tracking, and progress monitoring.
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import JSONB
 from typing import Optional
 from datetime import datetime
-from ..database import get_async_db
-from ..models import User, WorkoutPlan, ExerciseRecord, WorkoutLog
+from ..database import get_async_db, async_engine
+from ..models import User, WorkoutPlan, WorkoutLog
 from ..schemas import APIResponse, WorkoutLogCreate
-import json # Added for workout plan discovery endpoints
+from ..utils.ttl_cache import TTLCache
+import logging
+import orjson
+
+logger = logging.getLogger(__name__)
 
 # Import the workout plan manager
 try:
     from ..utils.workout_plan_manager import workout_plan_manager
     WORKOUT_PLAN_MANAGER_AVAILABLE = True
 except ImportError:
-    print("⚠️ workout_plan_manager not available")
+    logger.warning("⚠️ workout_plan_manager not available")
     WORKOUT_PLAN_MANAGER_AVAILABLE = False
 
-router = APIRouter()
+# Shared workout plan service; one Supabase client for every request
+try:
+    from ..services.workout_plan_service import workout_plan_service
+    WORKOUT_PLAN_SERVICE_AVAILABLE = True
+except Exception as e:
+    logger.warning("⚠️ workout_plan_service not available: %s", e)
+    WORKOUT_PLAN_SERVICE_AVAILABLE = False
+
+router = APIRouter(default_response_class=ORJSONResponse)
+
+_IS_POSTGRES = async_engine.dialect.name == "postgresql"
+
+def _load_json_plans() -> dict:
+    """Load the bundled default plans used as a fallback by the plan discovery endpoints"""
+    try:
+        with open("app/data/workout_plans.json", "rb") as f:
+            return orjson.loads(f.read())
+    except FileNotFoundError:
+        return {}
+
+# The default plans ship with the app, so parse them once at import
+_JSON_PLANS = _load_json_plans()
+
+# Plan fields exposed by plan discovery and their defaults when missing. The
+# defaults are only ever serialized, never mutated, so sharing them is safe.
+_PLAN_SHAPE = {
+    "overview": "",
+    "weekly_split": [],
+    "global_rules": [],
+    "days": {},
+    "conditioning_and_recovery": [],
+    "nutrition": {}
+}
+
+def _plan_for_frontend(plan_data: dict, metadata: dict, source: str) -> dict:
+    """Shape a stored or bundled plan for the plan discovery response"""
+    return {
+        **_PLAN_SHAPE,
+        **{key: plan_data[key] for key in _PLAN_SHAPE.keys() & plan_data.keys()},
+        "metadata": metadata,
+        "source": source
+    }
+
+# Metadata reported for every bundled default plan
+_JSON_PLAN_METADATA = {
+    "type": "default",
+    "category": "general",
+    "difficulty": "intermediate",
+    "duration": "12_weeks"
+}
+
+# Serialized plan responses. Stored plans only change through
+# regenerate_workout_plan, which invalidates the user's entry; full plans are
+# derived from the static plan JSON and the user's weight.
+_workout_plan_cache = TTLCache(ttl_seconds=300)
+_full_plan_cache = TTLCache(ttl_seconds=3600)
+# Plan categories/difficulties only change when a plan is written; keys carry
+# workout_plan_service.catalog_version so those writes take effect immediately.
+_plan_facets_cache = TTLCache(ttl_seconds=60)
+
+def _cache_response(cache: TTLCache, key, response: APIResponse) -> Response:
+    """Serialize an APIResponse once, store the bytes under key and return them"""
+    return _cache_payload(cache, key, response.model_dump())
+
+def _cache_payload(cache: TTLCache, key, payload: dict) -> Response:
+    """Serialize an APIResponse-shaped dict once, store the bytes under key and return them"""
+    body = orjson.dumps(payload)
+    cache.set(key, body)
+    return Response(content=body, media_type="application/json")
+
+async def _get_user_with_plan(db: AsyncSession, user_id: int):
+    """Fetch a user and their stored workout plan (or None) with a single LEFT JOIN
+    
+    Returns (None, None) when the user does not exist.
+    """
+    result = await db.execute(
+        select(User, WorkoutPlan)
+        .outerjoin(WorkoutPlan, WorkoutPlan.user_id == User.id)
+        .where(User.id == user_id)
+    )
+    row = result.first()
+    if row is None:
+        return None, None
+    return row.User, row.WorkoutPlan
+
+async def _get_goal_type_with_plan_payload(db: AsyncSession, user_id: int):
+    """Fetch a user's fitness goal type and their stored plan as a response-ready dict
+    
+    On Postgres the plan object is assembled server-side with jsonb_build_object;
+    other databases (the SQLite fallback) go through the ORM. Returns
+    (user_found, goal_type, plan) where plan is None when nothing is stored.
+    """
+    if _IS_POSTGRES:
+        result = await db.execute(_WORKOUT_PLAN_PAYLOAD_QUERY, {"user_id": user_id})
+        row = result.first()
+        if row is None:
+            return False, None, None
+        return True, row.fitness_goal_type, row.plan
+    
+    user, workout_plan = await _get_user_with_plan(db, user_id)
+    if user is None:
+        return False, None, None
+    if workout_plan is None:
+        return True, user.fitness_goal_type, None
+    return True, user.fitness_goal_type, {
+        "week_plan": workout_plan.week_plan,
+        "goal_type": workout_plan.goal_type,
+        "created_at": workout_plan.created_at.isoformat() if workout_plan.created_at else None,
+        "updated_at": workout_plan.updated_at.isoformat() if workout_plan.updated_at else None
+    }
+
+# Raw SQL statements are built once at import so every request reuses the
+# same text() objects and SQLAlchemy's compiled-statement cache entries
+
+# Workout history, joined from users so a missing user comes back as no rows
+# at all and a user without logs as a single NULL row
+_WORKOUT_HISTORY_QUERY = text("""
+    SELECT 
+        w.exercise_name,
+        COALESCE(CAST(w.sets AS INTEGER), 0) AS sets,
+        COALESCE(CAST(w.reps AS INTEGER), 0) AS reps,
+        COALESCE(CAST(w.weight AS FLOAT), 0.0) AS weight,
+        w.workout_date,
+        w.notes
+    FROM users u
+    LEFT JOIN workout_logs w ON w.user_id = u.id
+    WHERE u.id = :user_id
+    ORDER BY w.workout_date DESC
+    LIMIT 50
+""")
+
+# Last workout for one exercise, joined from users so a missing user comes
+# back as no row at all
+_LAST_EXERCISE_WORKOUT_QUERY = text("""
+    SELECT 
+        w.exercise_name,
+        w.sets,
+        w.reps,
+        w.weight,
+        w.workout_date
+    FROM users u
+    LEFT JOIN workout_logs w
+        ON w.user_id = u.id AND w.exercise_name = :exercise_name
+    WHERE u.id = :user_id
+    ORDER BY w.workout_date DESC
+    LIMIT 1
+""")
+
+# Workout log insert; an unknown user_id is rejected by the
+# workout_logs.user_id foreign key rather than a separate lookup
+_INSERT_WORKOUT_LOG_QUERY = text("""
+    INSERT INTO workout_logs (user_id, exercise_name, sets, reps, weight, notes, workout_date)
+    VALUES (:user_id, :exercise_name, :sets, :reps, :weight, :notes, :workout_date)
+    RETURNING id, workout_date
+""")
+
+# User goal type plus their stored plan, with the plan object built by Postgres
+_WORKOUT_PLAN_PAYLOAD_QUERY = text("""
+    SELECT
+        u.fitness_goal_type,
+        CASE WHEN wp.id IS NULL THEN NULL ELSE jsonb_build_object(
+            'week_plan', wp.week_plan,
+            'goal_type', wp.goal_type,
+            'created_at', wp.created_at,
+            'updated_at', wp.updated_at
+        ) END AS plan
+    FROM users u
+    LEFT JOIN workout_plans wp ON wp.user_id = u.id
+    WHERE u.id = :user_id
+    LIMIT 1
+""").columns(plan=JSONB)
+
+# Exercise record insert that leaves already-tracked exercises untouched
+_INSERT_EXERCISE_RECORD_QUERY = text("""
+    INSERT INTO exercise_records (user_id, exercise_name, max_weight, max_sets, max_reps)
+    VALUES (:user_id, :exercise_name, :max_weight, :max_sets, :max_reps)
+    ON CONFLICT (user_id, exercise_name) DO NOTHING
+""")
 
 @router.get("/test", response_model=APIResponse)
 async def test_workout_router():
@@ -36,60 +220,28 @@ async def test_workout_router():
 @router.get("/history/{user_id}", response_model=APIResponse)
 async def get_workout_history(user_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get workout history for a user"""
-    try:
-        # Use raw SQL to avoid any potential issues
-        from sqlalchemy import text
-        
-        # Verify user exists using raw SQL
-        user_check_query = text("SELECT id FROM users WHERE id = :user_id")
-        result = await db.execute(user_check_query, {"user_id": user_id})
-        user_exists = result.fetchone()
-        
-        if not user_exists:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        # Get workout history
-        query = text("""
-            SELECT 
-                exercise_name,
-                sets,
-                reps,
-                weight,
-                workout_date,
-                notes
-            FROM workout_logs 
-            WHERE user_id = :user_id
-            ORDER BY workout_date DESC
-            LIMIT 50
-        """)
-        
-        result = await db.execute(query, {"user_id": user_id})
-        workout_logs = result.fetchall()
-        
-        # Convert to list of dictionaries
-        history_data = []
-        for log in workout_logs:
-            history_data.append({
-                "exercise_name": log.exercise_name,
-                "sets": int(log.sets) if log.sets else 0,
-                "reps": int(log.reps) if log.reps else 0,
-                "weight": float(log.weight) if log.weight else 0.0,
-                "workout_date": log.workout_date.isoformat() if log.workout_date else None,
-                "notes": log.notes
-            })
-        
-        return APIResponse(
-            success=True,
-            message="Workout history retrieved successfully",
-            data={
-                "workout_history": history_data,
-                "total_workouts": len(history_data)
-            }
-        )
-        
-    except Exception as e:
-        print(f"Error in workout history endpoint: {e}")
-        raise HTTPException(status_code=500, detail="Internal server error")
+    result = await db.execute(_WORKOUT_HISTORY_QUERY, {"user_id": user_id})
+    workout_logs = result.mappings().all()
+    
+    if not workout_logs:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    # Rows are already typed by the query; drop the NULL row of a user without logs.
+    # workout_date keeps its isoformat() string (Pydantic would emit "Z" for UTC)
+    history_data = [
+        {**log, "workout_date": log["workout_date"].isoformat() if log["workout_date"] else None}
+        for log in workout_logs
+        if log["exercise_name"] is not None
+    ]
+    
+    return APIResponse(
+        success=True,
+        message="Workout history retrieved successfully",
+        data={
+            "workout_history": history_data,
+            "total_workouts": len(history_data)
+        }
+    )
 
 
 @router.get("/exercise-history/{user_id}/{exercise_name}", response_model=APIResponse)
@@ -99,110 +251,65 @@ async def get_exercise_history(
     db: AsyncSession = Depends(get_async_db)
 ):
     """Get exercise history for a specific exercise"""
-    try:
-        # Use raw SQL to avoid any potential issues
-        from sqlalchemy import text
-        
-        # Verify user exists using raw SQL
-        user_check_query = text("SELECT id FROM users WHERE id = :user_id")
-        result = await db.execute(user_check_query, {"user_id": user_id})
-        user_exists = result.fetchone()
-        
-        if not user_exists:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        # Get the last workout for this exercise
-        query = text("""
-            SELECT 
-                exercise_name,
-                sets,
-                reps,
-                weight,
-                workout_date
-            FROM workout_logs 
-            WHERE user_id = :user_id AND exercise_name = :exercise_name
-            ORDER BY workout_date DESC
-            LIMIT 1
-        """)
-        
-        result = await db.execute(query, {"user_id": user_id, "exercise_name": exercise_name})
-        last_workout = result.fetchone()
-        
-        if last_workout:
-            # User has done this exercise before
-            print(f"📊 Found last workout: {last_workout}")
-            
-            # Handle potential type issues
-            weight = float(last_workout.weight) if last_workout.weight else 0.0
-            sets = int(last_workout.sets) if last_workout.sets else 3
-            reps = int(last_workout.reps) if last_workout.reps else 10
-            
-            # Handle workout_date (could be string or datetime)
-            workout_date = last_workout.workout_date
-            if hasattr(workout_date, 'isoformat'):
-                date_str = workout_date.isoformat()
-            else:
-                date_str = str(workout_date) if workout_date else None
-            
-            suggested_weight = weight + 2.5  # Progressive overload
-            
-            return APIResponse(
-                success=True,
-                message="Exercise history retrieved successfully",
-                data={
-                    "is_new_exercise": False,
-                    "last_workout": {
-                        "weight": weight,
-                        "sets": sets,
-                        "reps": reps,
-                        "date": date_str
-                    },
-                    "suggested_weight": suggested_weight,
-                    "suggested_sets": sets,
-                    "suggested_reps": reps
-                }
-            )
+    result = await db.execute(_LAST_EXERCISE_WORKOUT_QUERY, {"user_id": user_id, "exercise_name": exercise_name})
+    last_workout = result.fetchone()
+    
+    if not last_workout:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    if last_workout.exercise_name is not None:
+        # User has done this exercise before
+        logger.debug("📊 Found last workout: %s", last_workout)
+        
+        # Handle potential type issues
+        weight = float(last_workout.weight) if last_workout.weight else 0.0
+        sets = int(last_workout.sets) if last_workout.sets else 3
+        reps = int(last_workout.reps) if last_workout.reps else 10
+        
+        # Handle workout_date (could be string or datetime)
+        workout_date = last_workout.workout_date
+        if hasattr(workout_date, 'isoformat'):
+            date_str = workout_date.isoformat()
         else:
-            # New exercise for this user
-            return APIResponse(
-                success=True,
-                message="Exercise history retrieved successfully",
-                data={
-                    "is_new_exercise": True,
-                    "last_workout": None,
-                    "suggested_weight": None,
-                    "suggested_sets": 3,
-                    "suggested_reps": 10
-                }
-            )
+            date_str = str(workout_date) if workout_date else None
         
-    except Exception as e:
-        print(f"Error in exercise history endpoint: {e}")
-        raise HTTPException(status_code=500, detail="Internal server error")
+        suggested_weight = weight + 2.5  # Progressive overload
+        
+        return APIResponse(
+            success=True,
+            message="Exercise history retrieved successfully",
+            data={
+                "is_new_exercise": False,
+                "last_workout": {
+                    "weight": weight,
+                    "sets": sets,
+                    "reps": reps,
+                    "date": date_str
+                },
+                "suggested_weight": suggested_weight,
+                "suggested_sets": sets,
+                "suggested_reps": reps
+            }
+        )
+    else:
+        # New exercise for this user
+        return APIResponse(
+            success=True,
+            message="Exercise history retrieved successfully",
+            data={
+                "is_new_exercise": True,
+                "last_workout": None,
+                "suggested_weight": None,
+                "suggested_sets": 3,
+                "suggested_reps": 10
+            }
+        )
 
 @router.post("/log", response_model=APIResponse)
 async def log_workout(workout_data: WorkoutLogCreate, user_id: int, db: AsyncSession = Depends(get_async_db)):
     """Log a workout session"""
     try:
-        # Use raw SQL to avoid any potential issues
-        from sqlalchemy import text
-        
-        # Verify user exists using raw SQL
-        user_check_query = text("SELECT id FROM users WHERE id = :user_id")
-        result = await db.execute(user_check_query, {"user_id": user_id})
-        user_exists = result.fetchone()
-        
-        if not user_exists:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        # Insert workout log using raw SQL
-        insert_query = text("""
-            INSERT INTO workout_logs (user_id, exercise_name, sets, reps, weight, notes, workout_date)
-            VALUES (:user_id, :exercise_name, :sets, :reps, :weight, :notes, :workout_date)
-            RETURNING id
-        """)
-        
-        result = await db.execute(insert_query, {
+        result = await db.execute(_INSERT_WORKOUT_LOG_QUERY, {
             "user_id": user_id,
             "exercise_name": workout_data.exercise_name,
             "sets": workout_data.sets,
@@ -212,12 +319,12 @@ async def log_workout(workout_data: WorkoutLogCreate, user_id: int, db: AsyncSes
             "workout_date": datetime.utcnow()
         })
         
-        # Get the inserted record ID
-        workout_id = result.scalar()
+        # Get the inserted record ID and stored timestamp from the same round-trip
+        workout_id, workout_date = result.one()
         
         await db.commit()
         
-        print(f"📊 Database: Stored workout log - User: {user_id}, Exercise: {workout_data.exercise_name}, ID: {workout_id}")
+        logger.debug("📊 Database: Stored workout log - User: %s, Exercise: %s, ID: %s", user_id, workout_data.exercise_name, workout_id)
         
         return APIResponse(
             success=True,
@@ -230,70 +337,125 @@ async def log_workout(workout_data: WorkoutLogCreate, user_id: int, db: AsyncSes
                 "reps": workout_data.reps,
                 "weight": workout_data.weight,
                 "notes": workout_data.notes or "",
-                "workout_date": datetime.utcnow().isoformat()
+                "workout_date": workout_date.isoformat() if hasattr(workout_date, "isoformat") else workout_date
             }
         )
     
-    except Exception as e:
-        print(f"Error in log_workout: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=404, detail="User not found")
+
+# Comprehensive exercise catalog with distinct names
+_EXERCISE_CATALOG = {
+    "Chest": [
+        "Bench Press", "Incline Bench Press", "Decline Bench Press", "Push-Up", 
+        "Dumbbell Chest Press", "Incline Dumbbell Press", "Decline Dumbbell Press",
+        "Cable Chest Press", "Machine Chest Press", "Dumbbell Chest Fly",
+        "Cable Chest Fly", "Pec Deck", "Smith Machine Bench Press"
+    ],
+    "Back": [
+        "Pull-Up", "Chin-Up", "Bent-Over Row", "Barbell Row", "Lat Pulldown",
+        "T-Bar Row", "Back Face Pull", "Cable Row", "Machine Row",
+        "Dumbbell Row", "Inverted Row", "Seated Cable Row"
+    ],
+    "Shoulders": [
+        "Overhead Press", "Military Press", "Lateral Raise", "Front Raise", 
+        "Rear Delt Fly", "Shrug", "Arnold Press", "Dumbbell Shoulder Press",
+        "Cable Lateral Raise", "Machine Shoulder Press", "Shoulder Face Pull",
+        "Upright Row", "Reverse Fly"
+    ],
+    "Biceps": [
+        "Bicep Curl", "Hammer Curl", "Preacher Curl", "Concentration Curl", 
+        "Barbell Curl", "Dumbbell Curl", "Cable Curl", "Machine Curl",
+        "Incline Dumbbell Curl", "Spider Curl", "Zottman Curl"
+    ],
+    "Triceps": [
+        "Tricep Dip", "Tricep Extension", "Skull Crusher", "Close-Grip Bench Press", 
+        "Tricep Pushdown", "Overhead Tricep Extension", "Cable Tricep Extension",
+        "Machine Tricep Extension", "Diamond Push-Up", "Tate Press"
+    ],
+    "Legs": [
+        "Squat", "Leg Deadlift", "Leg Press", "Lunge", "Calf Raise", 
+        "Romanian Deadlift", "Leg Extension", "Leg Curl", "Hack Squat",
+        "Bulgarian Split Squat", "Goblet Squat", "Box Squat", "Sumo Deadlift",
+        "Walking Lunge", "Seated Calf Raise", "Standing Calf Raise", "Hip Thrust",
+        "Front Squat", "Back Squat", "Ab Wheel", "Machine Dip", "Weighted Dip"
+    ],
+    "Abs": [
+        "Crunch", "Sit-Up", "Plank", "Leg Raise", "Russian Twist",
+        "Hanging Leg Raise", "Reverse Crunch", "Bicycle Crunch",
+        "Cable Woodchop", "Ab Wheel Rollout", "Mountain Climber"
+    ]
+}
+
+# The catalog never changes, so the whole response body is serialized once
+_EXERCISE_CATALOG_RESPONSE = orjson.dumps({
+    "success": True,
+    "message": "Exercise catalog retrieved successfully",
+    "data": _EXERCISE_CATALOG
+})
 
-@router.get("/exercise-catalog", response_model=APIResponse)
+@router.get("/exercise-catalog")
 async def get_exercise_catalog():
     """Get the comprehensive exercise catalog organized by muscle groups"""
-    try:
-        # Comprehensive exercise catalog with distinct names
-        exercise_catalog = {
-            "Chest": [
-                "Bench Press", "Incline Bench Press", "Decline Bench Press", "Push-Up", 
-                "Dumbbell Chest Press", "Incline Dumbbell Press", "Decline Dumbbell Press",
-                "Cable Chest Press", "Machine Chest Press", "Dumbbell Chest Fly",
-                "Cable Chest Fly", "Pec Deck", "Smith Machine Bench Press"
-            ],
-            "Back": [
-                "Pull-Up", "Chin-Up", "Bent-Over Row", "Barbell Row", "Lat Pulldown",
-                "T-Bar Row", "Back Face Pull", "Cable Row", "Machine Row",
-                "Dumbbell Row", "Inverted Row", "Seated Cable Row"
-            ],
-            "Shoulders": [
-                "Overhead Press", "Military Press", "Lateral Raise", "Front Raise", 
-                "Rear Delt Fly", "Shrug", "Arnold Press", "Dumbbell Shoulder Press",
-                "Cable Lateral Raise", "Machine Shoulder Press", "Shoulder Face Pull",
-                "Upright Row", "Reverse Fly"
-            ],
-            "Biceps": [
-                "Bicep Curl", "Hammer Curl", "Preacher Curl", "Concentration Curl", 
-                "Barbell Curl", "Dumbbell Curl", "Cable Curl", "Machine Curl",
-                "Incline Dumbbell Curl", "Spider Curl", "Zottman Curl"
-            ],
-            "Triceps": [
-                "Tricep Dip", "Tricep Extension", "Skull Crusher", "Close-Grip Bench Press", 
-                "Tricep Pushdown", "Overhead Tricep Extension", "Cable Tricep Extension",
-                "Machine Tricep Extension", "Diamond Push-Up", "Tate Press"
-            ],
-            "Legs": [
-                "Squat", "Leg Deadlift", "Leg Press", "Lunge", "Calf Raise", 
-                "Romanian Deadlift", "Leg Extension", "Leg Curl", "Hack Squat",
-                "Bulgarian Split Squat", "Goblet Squat", "Box Squat", "Sumo Deadlift",
-                "Walking Lunge", "Seated Calf Raise", "Standing Calf Raise", "Hip Thrust",
-                "Front Squat", "Back Squat", "Ab Wheel", "Machine Dip", "Weighted Dip"
-            ],
-            "Abs": [
-                "Crunch", "Sit-Up", "Plank", "Leg Raise", "Russian Twist",
-                "Hanging Leg Raise", "Reverse Crunch", "Bicycle Crunch",
-                "Cable Woodchop", "Ab Wheel Rollout", "Mountain Climber"
-            ]
-        }
-        
-        return APIResponse(
-            success=True,
-            message="Exercise catalog retrieved successfully",
-            data=exercise_catalog
-        )
-        
-    except Exception as e:
-        print(f"Error in exercise catalog endpoint: {e}")
-        raise HTTPException(status_code=500, detail="Internal server error")
+    return Response(content=_EXERCISE_CATALOG_RESPONSE, media_type="application/json")
+
+# Muscle group keywords, checked in order; the first group with a keyword
+# contained in the exercise name wins. The trailing entries are the looser
+# fallback patterns used when none of the primary groups match.
+_MUSCLE_GROUP_KEYWORDS = (
+    ("Chest", ("bench", "press", "fly", "push-up", "dip", "chest")),
+    ("Back", ("row", "pull-up", "chin-up", "deadlift", "lat", "back")),
+    ("Shoulders", ("shoulder", "press", "raise", "delt", "arnold")),
+    ("Biceps", ("curl", "bicep", "preacher")),
+    ("Triceps", ("tricep", "extension", "pushdown", "skull")),
+    ("Legs", ("squat", "lunge", "leg", "deadlift", "calf", "hamstring")),
+    ("Abs", ("crunch", "sit-up", "plank", "ab", "core")),
+    # Fallback patterns
+    ("Chest", ("bench", "press", "fly")),
+    ("Back", ("row", "pull", "deadlift")),
+    ("Biceps", ("curl", "bicep")),
+    ("Triceps", ("tricep", "extension")),
+    ("Legs", ("squat", "lunge", "leg")),
+)
+
+# The keyword table rendered as a SQL CASE so Postgres buckets the rows; the
+# keywords are fixed literals, so inlining them is safe
+_MUSCLE_GROUP_CASE_SQL = "CASE {} ELSE 'Other' END".format(" ".join(
+    "WHEN {} THEN '{}'".format(
+        " OR ".join(f"lower(r.exercise_name) LIKE '%{keyword}%'" for keyword in keywords),
+        group
+    )
+    for group, keywords in _MUSCLE_GROUP_KEYWORDS
+))
+
+# Last workout for each exercise using window functions, joined from users so
+# a missing user comes back as no rows at all. Rows arrive already classified
+# and ordered most recent first (undated last, ties by exercise name).
+_EXERCISE_PROGRESS_QUERY = text(f"""
+    WITH ranked_workouts AS (
+        SELECT 
+            exercise_name,
+            sets,
+            reps,
+            weight,
+            workout_date,
+            ROW_NUMBER() OVER (PARTITION BY exercise_name ORDER BY workout_date DESC) as rn
+        FROM workout_logs 
+        WHERE user_id = :user_id
+    )
+    SELECT 
+        r.exercise_name,
+        CAST(NULLIF(r.weight, 0) AS FLOAT) AS last_weight,
+        CAST(NULLIF(r.sets, 0) AS INTEGER) AS last_sets,
+        CAST(NULLIF(r.reps, 0) AS INTEGER) AS last_reps,
+        r.workout_date AS last_workout_date,
+        {_MUSCLE_GROUP_CASE_SQL} AS muscle_group
+    FROM users u
+    LEFT JOIN ranked_workouts r ON r.rn = 1
+    WHERE u.id = :user_id
+    ORDER BY (r.workout_date IS NULL), r.workout_date DESC, r.exercise_name
+""")
 
 @router.get("/user-exercise-progress/{user_id}", response_model=APIResponse)
 async def get_user_exercise_progress(
@@ -301,658 +463,491 @@ async def get_user_exercise_progress(
     db: AsyncSession = Depends(get_async_db)
 ):
     """Get comprehensive exercise progress for a user organized by muscle groups"""
-    try:
-        # Use raw SQL to get the last workout for each exercise
-        from sqlalchemy import text
-        
-        # Verify user exists
-        user_check_query = text("SELECT id FROM users WHERE id = :user_id")
-        result = await db.execute(user_check_query, {"user_id": user_id})
-        user_exists = result.fetchone()
-        
-        if not user_exists:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        # Get the last workout for each exercise using window functions
-        query = text("""
-            WITH ranked_workouts AS (
-                SELECT 
-                    exercise_name,
-                    sets,
-                    reps,
-                    weight,
-                    workout_date,
-                    ROW_NUMBER() OVER (PARTITION BY exercise_name ORDER BY workout_date DESC) as rn
-                FROM workout_logs 
-                WHERE user_id = :user_id
-            )
-            SELECT 
-                exercise_name,
-                sets,
-                reps,
-                weight,
-                workout_date
-            FROM ranked_workouts 
-            WHERE rn = 1
-            ORDER BY exercise_name
-        """)
-        
-        result = await db.execute(query, {"user_id": user_id})
-        user_workouts = result.fetchall()
-        
-        # Organize by muscle groups
-        progress_by_muscle_group = {
-            "Chest": [],
-            "Back": [],
-            "Shoulders": [],
-            "Biceps": [],
-            "Triceps": [],
-            "Legs": [],
-            "Abs": []
-        }
-        
-        # Define muscle group mappings
-        muscle_group_mapping = {
-            "Chest": ["bench", "press", "fly", "push-up", "dip", "chest"],
-            "Back": ["row", "pull-up", "chin-up", "deadlift", "lat", "back"],
-            "Shoulders": ["shoulder", "press", "raise", "delt", "arnold"],
-            "Biceps": ["curl", "bicep", "preacher"],
-            "Triceps": ["tricep", "extension", "pushdown", "skull"],
-            "Legs": ["squat", "lunge", "leg", "deadlift", "calf", "hamstring"],
-            "Abs": ["crunch", "sit-up", "plank", "ab", "core"]
-        }
-        
-        # Process each workout and categorize by muscle group
-        for workout in user_workouts:
-            exercise_name = workout.exercise_name.lower()
-            assigned_group = None
-            
-            # Find the appropriate muscle group
-            for group, keywords in muscle_group_mapping.items():
-                if any(keyword in exercise_name for keyword in keywords):
-                    assigned_group = group
-                    break
-            
-            # If no specific match, try to categorize based on exercise name patterns
-            if not assigned_group:
-                if any(word in exercise_name for word in ["bench", "press", "fly"]):
-                    assigned_group = "Chest"
-                elif any(word in exercise_name for word in ["row", "pull", "deadlift"]):
-                    assigned_group = "Back"
-                elif any(word in exercise_name for word in ["curl", "bicep"]):
-                    assigned_group = "Biceps"
-                elif any(word in exercise_name for word in ["tricep", "extension"]):
-                    assigned_group = "Triceps"
-                elif any(word in exercise_name for word in ["squat", "lunge", "leg"]):
-                    assigned_group = "Legs"
-                else:
-                    assigned_group = "Other"  # Fallback category
-            
-            if assigned_group in progress_by_muscle_group:
-                progress_by_muscle_group[assigned_group].append({
-                    "exercise_name": workout.exercise_name,
-                    "last_weight": float(workout.weight) if workout.weight else None,
-                    "last_sets": int(workout.sets) if workout.sets else None,
-                    "last_reps": int(workout.reps) if workout.reps else None,
-                    "last_workout_date": workout.workout_date.isoformat() if workout.workout_date else None
-                })
-        
-        # Sort exercises within each muscle group by last workout date (most recent first)
-        for group in progress_by_muscle_group:
-            progress_by_muscle_group[group].sort(
-                key=lambda x: x["last_workout_date"] if x["last_workout_date"] else "1900-01-01",
-                reverse=True
-            )
-        
-        return APIResponse(
-            success=True,
-            message="User exercise progress retrieved successfully",
-            data=progress_by_muscle_group
-        )
-        
-    except Exception as e:
-        print(f"Error in user exercise progress endpoint: {e}")
-        raise HTTPException(status_code=500, detail="Internal server error")
+    result = await db.execute(_EXERCISE_PROGRESS_QUERY, {"user_id": user_id})
+    user_workouts = result.mappings().all()
+    
+    if not user_workouts:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    # Organize by muscle groups
+    progress_by_muscle_group = {
+        "Chest": [],
+        "Back": [],
+        "Shoulders": [],
+        "Biceps": [],
+        "Triceps": [],
+        "Legs": [],
+        "Abs": []
+    }
+    
+    # Bucket each workout by the muscle group computed in SQL; rows are
+    # already typed and named by the query
+    for workout in user_workouts:
+        if workout["exercise_name"] is None:
+            continue
+        
+        entry = dict(workout)
+        group = entry.pop("muscle_group")
+        entry["last_workout_date"] = entry["last_workout_date"].isoformat() if entry["last_workout_date"] else None
+        if group in progress_by_muscle_group:
+            progress_by_muscle_group[group].append(entry)
+    
+    return APIResponse(
+        success=True,
+        message="User exercise progress retrieved successfully",
+        data=progress_by_muscle_group
+    )
 
 
 @router.get("/today/{user_id}", response_model=APIResponse)
 async def get_todays_workout(user_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get today's workout plan for a user"""
-    try:
-        # Get user's workout plan
-        workout_plan = await db.execute(
-            select(WorkoutPlan).where(WorkoutPlan.user_id == user_id)
-        )
-        workout_plan = workout_plan.scalar_one_or_none()
-        
-        if not workout_plan:
-            raise HTTPException(status_code=404, detail="No workout plan found for user")
-        
-        # Determine which day of the week it is (0 = Monday, 6 = Sunday)
-        from datetime import datetime
-        today = datetime.now()
-        day_of_week = today.weekday()  # 0 = Monday, 6 = Sunday
-        
-        # Map day of week to workout plan day
-        day_mapping = {
-            0: 0,  # Monday -> Day 1
-            1: 1,  # Tuesday -> Day 2
-            2: 2,  # Wednesday -> Day 3
-            3: 3,  # Thursday -> Day 4
-            4: 4,  # Friday -> Day 5
-            5: 5,  # Saturday -> Day 6
-            6: 6   # Sunday -> Day 7 (Rest)
+    # Get user's workout plan
+    workout_plan = await db.execute(
+        select(WorkoutPlan).where(WorkoutPlan.user_id == user_id)
+    )
+    workout_plan = workout_plan.scalar_one_or_none()
+    
+    if not workout_plan:
+        raise HTTPException(status_code=404, detail="No workout plan found for user")
+    
+    # Determine which day of the week it is (0 = Monday, 6 = Sunday)
+    today = datetime.now()
+    day_of_week = today.weekday()  # 0 = Monday, 6 = Sunday
+    
+    # Plan days line up with weekdays: Monday -> Day 1 ... Sunday -> Day 7 (Rest)
+    plan_day_index = day_of_week
+    todays_plan = workout_plan.week_plan[plan_day_index]
+    
+    return APIResponse(
+        success=True,
+        message="Today's workout plan retrieved successfully",
+        data={
+            "today_workout": todays_plan,
+            "day_of_week": day_of_week,
+            "plan_day": plan_day_index + 1,
+            "sets_per_exercise": 3  # Default sets per exercise
         }
-        
-        plan_day_index = day_mapping[day_of_week]
-        todays_plan = workout_plan.week_plan[plan_day_index]
-        
-        return APIResponse(
-            success=True,
-            message="Today's workout plan retrieved successfully",
-            data={
-                "today_workout": todays_plan,
-                "day_of_week": day_of_week,
-                "plan_day": plan_day_index + 1,
-                "sets_per_exercise": 3  # Default sets per exercise
-            }
-        )
-        
-    except Exception as e:
-        print(f"Error in today's workout endpoint: {e}")
-        raise HTTPException(status_code=500, detail="Internal server error")
+    )
 
 @router.post("/plan/{user_id}/regenerate", response_model=APIResponse)
 async def regenerate_workout_plan(user_id: int, db: AsyncSession = Depends(get_async_db)):
     """Force regeneration of workout plan for user using current exercise catalog"""
-    try:
-        # Get user data
-        user = await db.get(User, user_id)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        # Delete existing workout plan
-        existing_plan = await db.execute(
-            select(WorkoutPlan).where(WorkoutPlan.user_id == user_id)
+    # Get user data and existing workout plan in one round-trip
+    user, existing_plan = await _get_user_with_plan(db, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    # Delete existing workout plan; committed together with the new plan below
+    if existing_plan:
+        await db.delete(existing_plan)
+        logger.info("🗑️ Deleted existing workout plan for user %s", user_id)
+    
+    # Generate new workout plan using AI
+    if WORKOUT_PLAN_MANAGER_AVAILABLE:
+        try:
+            # Prepare user data for AI
+            user_data = {
+                "name": user.name,
+                "age": user.age,
+                "weight": user.weight,
+                "height": user.height,
+                "fitness_goals": user.fitness_goals,
+                "fitness_goal_type": user.fitness_goal_type,
+                "injuries_limitations": user.injuries_limitations
+            }
+            
+            # Generate workout plan using AI
+            ai_plan = workout_plan_manager.generate_workout_plan(user_data, "Create a 7-day workout plan for me")
+            
+            logger.debug("🤖 AI Generated Plan: %s...", ai_plan[:200])
+            
+            # Use the translator to convert AI response to structured format
+            workout_plan_data = workout_plan_manager.translate_ai_response(ai_plan, user.fitness_goal_type)
+            
+        except Exception as e:
+            logger.error("Error generating AI workout plan: %s", e)
+            # Use fallback plan if AI generation fails
+            workout_plan_data = workout_plan_manager.create_fallback_plan(user.fitness_goal_type)
+            raise HTTPException(
+                status_code=500, 
+                detail="Failed to generate workout plan. Please try again later."
+            )
+    else:
+        # AI workout generation not available, use fallback plan
+        workout_plan_data = workout_plan_manager.create_fallback_plan(user.fitness_goal_type)
+        raise HTTPException(
+            status_code=503, 
+            detail="Workout plan generation service is currently unavailable. Please try again later."
         )
-        existing_plan = existing_plan.scalar_one_or_none()
-        
-        if existing_plan:
-            await db.delete(existing_plan)
-            await db.commit()
-            print(f"🗑️ Deleted existing workout plan for user {user_id}")
-        
-        # Generate new workout plan using AI
+    
+    # Store the new workout plan
+    db_workout_plan = WorkoutPlan(
+        user_id=user_id,
+        week_plan=workout_plan_data["week_plan"],
+        goal_type=workout_plan_data["goal_type"]
+    )
+    db.add(db_workout_plan)
+    
+    # Create exercise records for all exercises in the plan
+    all_exercises = set()
+    for day in workout_plan_data["week_plan"]:
+        for exercise in day["exercises"]:
+            all_exercises.add(exercise)
+    
+    # Create exercise records for exercises not already tracked; the
+    # (user_id, exercise_name) unique constraint skips existing ones
+    if all_exercises:
+        await db.execute(
+            _INSERT_EXERCISE_RECORD_QUERY,
+            [
+                {
+                    "user_id": user_id,
+                    "exercise_name": exercise_name,
+                    "max_weight": 0.0,
+                    "max_sets": 3,
+                    "max_reps": 10
+                }
+                for exercise_name in all_exercises
+            ]
+        )
+    
+    # Delete, new plan and exercise records land in a single transaction
+    await db.commit()
+    _workout_plan_cache.invalidate(user_id)
+    
+    return APIResponse(
+        success=True,
+        message="Workout plan regenerated successfully",
+        data={
+            "plan": {
+                "week_plan": workout_plan_data["week_plan"],
+                "goal_type": workout_plan_data["goal_type"],
+                "created_at": db_workout_plan.created_at.isoformat() if db_workout_plan.created_at else None,
+                "updated_at": db_workout_plan.updated_at.isoformat() if db_workout_plan.updated_at else None
+            },
+            "ai_recommendation": "I've regenerated your workout plan using the latest exercise catalog. This plan is designed to help you achieve your fitness goals with a balanced approach to muscle development and recovery."
+        }
+    )
+
+@router.get("/plan/{user_id}", response_model=APIResponse)
+async def get_workout_plan(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Get personalized workout plan for user"""
+    cached_body = _workout_plan_cache.get(user_id)
+    if cached_body is not None:
+        return Response(content=cached_body, media_type="application/json")
+    
+    # Get the user's goal type and stored workout plan in one round-trip
+    user_found, goal_type, stored_plan = await _get_goal_type_with_plan_payload(db, user_id)
+    if not user_found:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    if stored_plan:
+        # Return stored workout plan
+        return _cache_response(_workout_plan_cache, user_id, APIResponse(
+            success=True,
+            message="Workout plan retrieved successfully",
+            data={
+                "plan": stored_plan,
+                "ai_recommendation": "Here's your personalized workout plan designed to help you achieve your fitness goals. Each day focuses on specific muscle groups to ensure balanced development and proper recovery."
+            }
+        ))
+    else:
+        # No workout plan exists - generate one using structured JSON plans
         if WORKOUT_PLAN_MANAGER_AVAILABLE:
             try:
-                # Prepare user data for AI
-                user_data = {
-                    "name": user.name,
-                    "age": user.age,
-                    "weight": user.weight,
-                    "height": user.height,
-                    "fitness_goals": user.fitness_goals,
-                    "fitness_goal_type": user.fitness_goal_type,
-                    "injuries_limitations": user.injuries_limitations
-                }
-                
-                # Generate workout plan using AI
-                ai_plan = workout_plan_manager.generate_workout_plan(user_data, "Create a 7-day workout plan for me")
+                # Convert JSON plan to week_plan format
+                week_plan = workout_plan_manager.convert_to_week_plan_format(goal_type)
                 
-                print(f"🤖 AI Generated Plan: {ai_plan[:200]}...")
+                # Store the new workout plan
+                db_workout_plan = WorkoutPlan(
+                    user_id=user_id,
+                    week_plan=week_plan,
+                    goal_type=goal_type
+                )
+                db.add(db_workout_plan)
+                await db.commit()
+                await db.refresh(db_workout_plan)
                 
-                # Use the translator to convert AI response to structured format
-                workout_plan_data = workout_plan_manager.translate_ai_response(ai_plan, user.fitness_goal_type)
+                return APIResponse(
+                    success=True,
+                    message="Workout plan generated and stored successfully",
+                    data={
+                        "plan": {
+                            "week_plan": week_plan,
+                            "goal_type": goal_type,
+                            "created_at": db_workout_plan.created_at.isoformat() if db_workout_plan.created_at else None,
+                            "updated_at": db_workout_plan.updated_at.isoformat() if db_workout_plan.updated_at else None
+                        },
+                        "ai_recommendation": f"I've created a personalized workout plan for your {goal_type.replace('_', ' ')} goals! This evidence-based plan is designed to help you achieve optimal results with proper progression and recovery."
+                    }
+                )
                 
             except Exception as e:
-                print(f"Error generating AI workout plan: {e}")
-                # Use fallback plan if AI generation fails
-                workout_plan_data = workout_plan_manager.create_fallback_plan(user.fitness_goal_type)
+                logger.error("Error generating structured workout plan: %s", e)
                 raise HTTPException(
-                    status_code=500, 
+                    status_code=500,
                     detail="Failed to generate workout plan. Please try again later."
                 )
         else:
-            # AI workout generation not available, use fallback plan
-            workout_plan_data = workout_plan_manager.create_fallback_plan(user.fitness_goal_type)
             raise HTTPException(
-                status_code=503, 
-                detail="Workout plan generation service is currently unavailable. Please try again later."
-            )
-        
-        # Store the new workout plan
-        db_workout_plan = WorkoutPlan(
-            user_id=user_id,
-            week_plan=workout_plan_data["week_plan"],
-            goal_type=workout_plan_data["goal_type"]
-        )
-        db.add(db_workout_plan)
-        await db.commit()
-        await db.refresh(db_workout_plan)
-        
-        # Create exercise records for all exercises in the plan
-        all_exercises = set()
-        for day in workout_plan_data["week_plan"]:
-            for exercise in day["exercises"]:
-                all_exercises.add(exercise)
-        
-        # Check existing exercise records
-        existing_records = await db.execute(
-            select(ExerciseRecord).where(ExerciseRecord.user_id == user_id)
-        )
-        existing_exercises = {record.exercise_name for record in existing_records.scalars().all()}
-        
-        # Create new exercise records for exercises not already tracked
-        for exercise_name in all_exercises:
-            if exercise_name not in existing_exercises:
-                exercise_record = ExerciseRecord(
-                    user_id=user_id,
-                    exercise_name=exercise_name,
-                    max_weight=0.0,
-                    max_sets=3,
-                    max_reps=10
-                )
-                db.add(exercise_record)
-        
-        await db.commit()
-        
-        return APIResponse(
-            success=True,
-            message="Workout plan regenerated successfully",
-            data={
-                "plan": {
-                    "week_plan": workout_plan_data["week_plan"],
-                    "goal_type": workout_plan_data["goal_type"],
-                    "created_at": db_workout_plan.created_at.isoformat() if db_workout_plan.created_at else None,
-                    "updated_at": db_workout_plan.updated_at.isoformat() if db_workout_plan.updated_at else None
-                },
-                "ai_recommendation": "I've regenerated your workout plan using the latest exercise catalog. This plan is designed to help you achieve your fitness goals with a balanced approach to muscle development and recovery."
-            }
-        )
-        
-    except Exception as e:
-        print(f"Error in workout plan regeneration: {e}")
-        raise HTTPException(status_code=500, detail="Internal server error")
-
-@router.get("/plan/{user_id}", response_model=APIResponse)
-async def get_workout_plan(user_id: int, db: AsyncSession = Depends(get_async_db)):
-    """Get personalized workout plan for user"""
-    try:
-        # Get user data
-        user = await db.get(User, user_id)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        # Check if user has a stored workout plan
-        workout_plan = await db.execute(
-            select(WorkoutPlan).where(WorkoutPlan.user_id == user_id)
-        )
-        workout_plan = workout_plan.scalar_one_or_none()
-        
-        if workout_plan:
-            # Return stored workout plan
-            return APIResponse(
-                success=True,
-                message="Workout plan retrieved successfully",
-                data={
-                    "plan": {
-                        "week_plan": workout_plan.week_plan,
-                        "goal_type": workout_plan.goal_type,
-                        "created_at": workout_plan.created_at.isoformat() if workout_plan.created_at else None,
-                        "updated_at": workout_plan.updated_at.isoformat() if workout_plan.updated_at else None
-                    },
-                    "ai_recommendation": "Here's your personalized workout plan designed to help you achieve your fitness goals. Each day focuses on specific muscle groups to ensure balanced development and proper recovery."
-                }
+                status_code=500,
+                detail="Workout plan generation not available."
             )
-        else:
-            # No workout plan exists - generate one using structured JSON plans
-            if WORKOUT_PLAN_MANAGER_AVAILABLE:
-                try:
-                    # Get the user's fitness goal type
-                    goal_type = user.fitness_goal_type
-                    
-                    # Convert JSON plan to week_plan format
-                    week_plan = workout_plan_manager.convert_to_week_plan_format(goal_type)
-                    
-                    # Store the new workout plan
-                    db_workout_plan = WorkoutPlan(
-                        user_id=user_id,
-                        week_plan=week_plan,
-                        goal_type=goal_type
-                    )
-                    db.add(db_workout_plan)
-                    await db.commit()
-                    await db.refresh(db_workout_plan)
-                    
-                    return APIResponse(
-                        success=True,
-                        message="Workout plan generated and stored successfully",
-                        data={
-                            "plan": {
-                                "week_plan": week_plan,
-                                "goal_type": goal_type,
-                                "created_at": db_workout_plan.created_at.isoformat() if db_workout_plan.created_at else None,
-                                "updated_at": db_workout_plan.updated_at.isoformat() if db_workout_plan.updated_at else None
-                            },
-                            "ai_recommendation": f"I've created a personalized workout plan for your {goal_type.replace('_', ' ')} goals! This evidence-based plan is designed to help you achieve optimal results with proper progression and recovery."
-                        }
-                    )
-                    
-                except Exception as e:
-                    print(f"Error generating structured workout plan: {e}")
-                    raise HTTPException(
-                        status_code=500,
-                        detail="Failed to generate workout plan. Please try again later."
-                    )
-            else:
-                raise HTTPException(
-                    status_code=500,
-                    detail="Workout plan generation not available."
-                )
-            
-    except Exception as e:
-        print(f"Error in workout plan endpoint: {e}")
-        raise HTTPException(status_code=500, detail="Internal server error") 
 
 @router.get("/plan-full/{user_id}", response_model=APIResponse)
 async def get_full_workout_plan(user_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get full workout plan data including nutrition, rules, and guidelines"""
-    try:
-        # Get user data
-        user = await db.get(User, user_id)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        if not WORKOUT_PLAN_MANAGER_AVAILABLE:
-            raise HTTPException(status_code=500, detail="Workout plan manager not available")
-        
-        goal_type = user.fitness_goal_type
-        plan = workout_plan_manager.get_plan(goal_type)
-        
-        if not plan:
-            raise HTTPException(status_code=404, detail=f"No workout plan found for goal type: {goal_type}")
-        
-        # Calculate nutrition targets based on user weight
-        nutrition_targets = workout_plan_manager.calculate_nutrition_targets(goal_type, user.weight)
-        
-        # Transform nutrition data for iOS app compatibility with weight-based conversions
-        nutrition_data = plan.get("nutrition", {})
-        
-        # Convert supplements from string to array if needed, then apply weight conversions
-        supplements = nutrition_data.get("supplements", [])
-        if isinstance(supplements, str):
-            supplements = [s.strip() for s in supplements.split('\n') if s.strip()]
-        supplements = workout_plan_manager._convert_weight_based_text(supplements, user.weight)
-        
-        # Convert timing data and apply weight conversions
-        timing = nutrition_data.get("timing_and_training_day_setup", [])
-        if isinstance(timing, str):
-            timing = [t.strip() for t in timing.split('\n') if t.strip()]
-        timing = workout_plan_manager._convert_weight_based_text(timing, user.weight)
-        
-        # Transform hydration data and apply weight conversions
-        hydration = nutrition_data.get("hydration_and_electrolytes", {})
-        if isinstance(hydration, dict):
-            hydration_list = []
-            for key, value in hydration.items():
-                if isinstance(value, str):
-                    hydration_list.append(f"{key}: {value}")
-                else:
-                    hydration_list.append(f"{key}: {str(value)}")
-            hydration = hydration_list
-        hydration = workout_plan_manager._convert_weight_based_text(hydration, user.weight)
-        
-        # Apply weight conversions to other nutrition fields
-        goal = workout_plan_manager._convert_weight_based_text(nutrition_data.get("goal", ""), user.weight)
-        calories = workout_plan_manager._convert_weight_based_text(nutrition_data.get("calories", ""), user.weight)
-        protein = workout_plan_manager._convert_weight_based_text(nutrition_data.get("protein", ""), user.weight)
-        carbohydrate = workout_plan_manager._convert_weight_based_text(nutrition_data.get("carbohydrate", ""), user.weight)
-        fat = workout_plan_manager._convert_weight_based_text(nutrition_data.get("fat", ""), user.weight)
-        
-        # Create iOS-compatible nutrition structure
-        ios_nutrition = {
-            "goal": goal,
-            "calories": calories,
-            "protein": protein,
-            "carbohydrate": carbohydrate,
-            "fat": fat,
-            "supplements": supplements,
-            "hydration_and_electrolytes": hydration,
-            "timing": timing
+    # Get user data
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    if not WORKOUT_PLAN_MANAGER_AVAILABLE:
+        raise HTTPException(status_code=500, detail="Workout plan manager not available")
+    
+    goal_type = user.fitness_goal_type
+    
+    # The response depends only on the goal type and body weight
+    full_plan_key = (goal_type, user.weight)
+    cached_body = _full_plan_cache.get(full_plan_key)
+    if cached_body is not None:
+        return Response(content=cached_body, media_type="application/json")
+    
+    plan = workout_plan_manager.get_plan(goal_type)
+    
+    if not plan:
+        raise HTTPException(status_code=404, detail=f"No workout plan found for goal type: {goal_type}")
+    
+    # Calculate nutrition targets based on user weight
+    nutrition_targets = workout_plan_manager.calculate_nutrition_targets(goal_type, user.weight)
+    
+    # Transform nutrition data for iOS app compatibility with weight-based conversions
+    nutrition_data = plan.get("nutrition", {})
+    
+    # Convert supplements from string to array if needed
+    supplements = nutrition_data.get("supplements", [])
+    if isinstance(supplements, str):
+        supplements = [s.strip() for s in supplements.split('\n') if s.strip()]
+    
+    # Convert timing data to array if needed
+    timing = nutrition_data.get("timing_and_training_day_setup", [])
+    if isinstance(timing, str):
+        timing = [t.strip() for t in timing.split('\n') if t.strip()]
+    
+    # Transform hydration data
+    hydration = nutrition_data.get("hydration_and_electrolytes", {})
+    if isinstance(hydration, dict):
+        hydration_list = []
+        for key, value in hydration.items():
+            if isinstance(value, str):
+                hydration_list.append(f"{key}: {value}")
+            else:
+                hydration_list.append(f"{key}: {str(value)}")
+        hydration = hydration_list
+    
+    # Apply weight conversions to every nutrition field in a single batch:
+    # list fields are flattened into the batch and rebuilt afterwards
+    fields = [supplements, timing, hydration] + [
+        nutrition_data.get(field, "") for field in ("goal", "calories", "protein", "carbohydrate", "fat")
+    ]
+    batch = []
+    for value in fields:
+        batch.extend(value if isinstance(value, list) else [value])
+    converted = iter(workout_plan_manager._convert_weight_based_text(batch, user.weight))
+    supplements, timing, hydration, goal, calories, protein, carbohydrate, fat = [
+        [next(converted) for _ in value] if isinstance(value, list) else next(converted)
+        for value in fields
+    ]
+    
+    # Create iOS-compatible nutrition structure
+    ios_nutrition = {
+        "goal": goal,
+        "calories": calories,
+        "protein": protein,
+        "carbohydrate": carbohydrate,
+        "fat": fat,
+        "supplements": supplements,
+        "hydration_and_electrolytes": hydration,
+        "timing": timing
+    }
+    
+    return _cache_response(_full_plan_cache, full_plan_key, APIResponse(
+        success=True,
+        message="Full workout plan retrieved successfully",
+        data={
+            "overview": plan.get("overview", ""),
+            "weekly_split": plan.get("weekly_split", []),
+            "global_rules": plan.get("global_rules", []),
+            "days": plan.get("days", {}),
+            "conditioning_and_recovery": plan.get("conditioning_and_recovery", []),
+            "nutrition": ios_nutrition,
+            "nutrition_targets": nutrition_targets,
+            "execution_checklist": plan.get("execution_checklist", []),
+            "goal_type": goal_type
         }
-        
-        return APIResponse(
-            success=True,
-            message="Full workout plan retrieved successfully",
-            data={
-                "overview": plan.get("overview", ""),
-                "weekly_split": plan.get("weekly_split", []),
-                "global_rules": plan.get("global_rules", []),
-                "days": plan.get("days", {}),
-                "conditioning_and_recovery": plan.get("conditioning_and_recovery", []),
-                "nutrition": ios_nutrition,
-                "nutrition_targets": nutrition_targets,
-                "execution_checklist": plan.get("execution_checklist", []),
-                "goal_type": goal_type
-            }
-        )
-        
-    except Exception as e:
-        print(f"Error in full workout plan endpoint: {e}")
-        raise HTTPException(status_code=500, detail="Internal server error") 
+    ))
+
+def _iter_discovered_plans(db_plans: dict, category, difficulty, plan_type, limit: int):
+    """Yield (plan_id, plan) pairs for plan discovery: database plans first, then matching defaults"""
+    seen = 0
+    
+    # Add database plans (generated plans)
+    for plan_id, plan_info in db_plans.items():
+        yield plan_id, _plan_for_frontend(plan_info["plan_data"], plan_info["metadata"], "database")
+        seen += 1
+    
+    # Add JSON plans (default plans) if the filters match their fixed metadata
+    if (
+        category in (None, _JSON_PLAN_METADATA["category"])
+        and difficulty in (None, _JSON_PLAN_METADATA["difficulty"])
+        and plan_type in (None, _JSON_PLAN_METADATA["type"])
+    ):
+        for plan_id, plan_data in _JSON_PLANS.items():
+            if seen >= limit:
+                break
+            if plan_id not in db_plans:  # Don't override database plans
+                yield plan_id, _plan_for_frontend(plan_data, _JSON_PLAN_METADATA, "json")
+                seen += 1
+
+def _stream_discovered_plans(plans, filters_applied: dict):
+    """Encode a plan discovery response incrementally, matching the APIResponse body"""
+    yield b'{"success":true,"message":"Workout plans discovered successfully","data":{"plans":{'
+    total = 0
+    for plan_id, plan in plans:
+        yield (b"," if total else b"") + orjson.dumps(plan_id) + b":" + orjson.dumps(plan)
+        total += 1
+    yield b'},"total_plans":' + str(total).encode() + b',"filters_applied":' + orjson.dumps(filters_applied) + b"}}"
 
 @router.get("/plans/discover", response_model=APIResponse)
 async def discover_workout_plans(
     category: str = None,
     difficulty: str = None,
     plan_type: str = None,
-    limit: int = 20
+    limit: int = 20,
+    stream: bool = False
 ):
     """Discover available workout plans with rich metadata for frontend display"""
+    if not WORKOUT_PLAN_SERVICE_AVAILABLE:
+        raise HTTPException(status_code=500, detail="Workout plan service not available")
+    
+    workout_service = workout_plan_service
+    
+    # Get matching plans from database; filters and limit are applied there
+    db_plans = {}
     try:
-        # Import WorkoutPlanService here to avoid circular imports
-        from ..services.workout_plan_service import WorkoutPlanService
-        
-        workout_service = WorkoutPlanService()
-        
-        # Get all plans from database
-        db_plans = {}
-        try:
-            db_plans = await workout_service.get_all_plans()
-        except Exception as e:
-            print(f"⚠️ Could not load plans from database: {e}")
-            db_plans = {}
-        
-        # Get plans from JSON file as fallback
-        json_plans = {}
-        try:
-            with open("app/data/workout_plans.json", "r") as f:
-                json_plans = json.load(f)
-        except FileNotFoundError:
-            pass
-        
-        # Combine and format plans for frontend
-        all_plans = {}
-        
-        # Add database plans (generated plans)
-        for plan_id, plan_data in db_plans.items():
-            # Get metadata for this plan
-            try:
-                metadata = await workout_service.get_plan_metadata(plan_id)
-                if metadata:
-                    all_plans[plan_id] = {
-                        "plan_data": plan_data,
-                        "metadata": metadata["metadata"],
-                        "created_at": metadata["created_at"],
-                        "updated_at": metadata["updated_at"],
-                        "source": "database"
-                    }
-            except Exception as e:
-                print(f"⚠️ Could not get metadata for plan {plan_id}: {e}")
-        
-        # Add JSON plans (default plans)
-        for plan_id, plan_data in json_plans.items():
-            if plan_id not in all_plans:  # Don't override database plans
-                all_plans[plan_id] = {
-                    "plan_data": plan_data,
-                    "metadata": {
-                        "type": "default",
-                        "category": "general",
-                        "difficulty": "intermediate",
-                        "duration": "12_weeks"
-                    },
-                    "created_at": "2024-01-01T00:00:00Z",
-                    "updated_at": "2024-01-01T00:00:00Z",
-                    "source": "json"
-                }
-        
-        # Filter plans based on query parameters
-        filtered_plans = {}
-        for plan_id, plan_info in all_plans.items():
-            # Apply category filter
-            if category and plan_info["metadata"].get("category") != category:
-                continue
-                
-            # Apply difficulty filter
-            if difficulty and plan_info["metadata"].get("difficulty") != difficulty:
-                continue
-                
-            # Apply plan type filter
-            if plan_type and plan_info["metadata"].get("type") != plan_type:
-                continue
-                
-            filtered_plans[plan_id] = plan_info
-        
-        # Limit results
-        limited_plans = dict(list(filtered_plans.items())[:limit])
-        
-        # Format response for frontend
-        plans_for_frontend = {}
-        for plan_id, plan_info in limited_plans.items():
-            plans_for_frontend[plan_id] = {
-                "overview": plan_info["plan_data"].get("overview", ""),
-                "weekly_split": plan_info["plan_data"].get("weekly_split", []),
-                "global_rules": plan_info["plan_data"].get("global_rules", []),
-                "days": plan_info["plan_data"].get("days", {}),
-                "conditioning_and_recovery": plan_info["plan_data"].get("conditioning_and_recovery", []),
-                "nutrition": plan_info["plan_data"].get("nutrition", {}),
-                "metadata": plan_info["metadata"],
-                "source": plan_info["source"]
-            }
-        
-        return APIResponse(
-            success=True,
-            message="Workout plans discovered successfully",
-            data={
-                "plans": plans_for_frontend,
-                "total_plans": len(plans_for_frontend),
-                "filters_applied": {
-                    "category": category,
-                    "difficulty": difficulty,
-                    "plan_type": plan_type,
-                    "limit": limit
-                }
-            }
+        db_plans = await workout_service.list_plans(
+            category=category,
+            difficulty=difficulty,
+            plan_type=plan_type,
+            limit=limit
         )
-        
     except Exception as e:
-        print(f"Error in workout plan discovery: {e}")
-        raise HTTPException(status_code=500, detail="Internal server error")
+        logger.warning("⚠️ Could not load plans from database: %s", e)
+        db_plans = {}
+    
+    plans = _iter_discovered_plans(db_plans, category, difficulty, plan_type, limit)
+    filters_applied = {
+        "category": category,
+        "difficulty": difficulty,
+        "plan_type": plan_type,
+        "limit": limit
+    }
+    
+    if stream:
+        # Encode plans one at a time instead of building the whole body first
+        return StreamingResponse(_stream_discovered_plans(plans, filters_applied), media_type="application/json")
+    
+    plans_for_frontend = dict(plans)
+    
+    return APIResponse(
+        success=True,
+        message="Workout plans discovered successfully",
+        data={
+            "plans": plans_for_frontend,
+            "total_plans": len(plans_for_frontend),
+            "filters_applied": filters_applied
+        }
+    )
 
 @router.get("/plans/categories", response_model=APIResponse)
 async def get_workout_plan_categories():
     """Get all available workout plan categories"""
+    if not WORKOUT_PLAN_SERVICE_AVAILABLE:
+        raise HTTPException(status_code=500, detail="Workout plan service not available")
+    
+    facets_key = ("categories", workout_plan_service.catalog_version)
+    cached_body = _plan_facets_cache.get(facets_key)
+    if cached_body is not None:
+        return Response(content=cached_body, media_type="application/json")
+    
+    workout_service = workout_plan_service
+    
+    # Collect categories in first-seen order; dict keys act as an ordered set
+    categories = {}
+    
+    # Get categories from database
     try:
-        # Import WorkoutPlanService here to avoid circular imports
-        from ..services.workout_plan_service import WorkoutPlanService
-        
-        workout_service = WorkoutPlanService()
-        
-        # Get categories from database
-        db_categories = set()
-        try:
-            db_plans = await workout_service.get_all_plans()
-            for plan_id, plan_data in db_plans.items():
-                metadata = await workout_service.get_plan_metadata(plan_id)
-                if metadata and "metadata" in metadata:
-                    category = metadata["metadata"].get("category")
-                    if category:
-                        db_categories.add(category)
-        except Exception as e:
-            print(f"⚠️ Could not load categories from database: {e}")
-        
-        # Get categories from JSON file
-        json_categories = set()
-        try:
-            with open("app/data/workout_plans.json", "r") as f:
-                json_plans = json.load(f)
-                for plan_id, plan_data in json_plans.items():
-                    # Default categories for JSON plans
-                    json_categories.add("general")
-        except FileNotFoundError:
-            pass
-        
-        # Combine all categories
-        all_categories = list(db_categories.union(json_categories))
-        
-        return APIResponse(
-            success=True,
-            message="Workout plan categories retrieved successfully",
-            data={
-                "categories": all_categories,
-                "total_categories": len(all_categories)
-            }
+        meta_by_id = await workout_service.get_all_plan_metadata()
+        categories = dict.fromkeys(
+            category for metadata in meta_by_id.values()
+            if (category := (metadata["metadata"] or {}).get("category"))
         )
-        
     except Exception as e:
-        print(f"Error getting workout plan categories: {e}")
-        raise HTTPException(status_code=500, detail="Internal server error")
+        logger.warning("⚠️ Could not load categories from database: %s", e)
+    
+    # Default category for JSON plans
+    if _JSON_PLANS:
+        categories.setdefault("general")
+    
+    all_categories = list(categories)
+    
+    return _cache_payload(_plan_facets_cache, facets_key, {
+        "success": True,
+        "message": "Workout plan categories retrieved successfully",
+        "data": {
+            "categories": all_categories,
+            "total_categories": len(all_categories)
+        }
+    })
 
 @router.get("/plans/difficulties", response_model=APIResponse)
 async def get_workout_plan_difficulties():
     """Get all available workout plan difficulties"""
+    if not WORKOUT_PLAN_SERVICE_AVAILABLE:
+        raise HTTPException(status_code=500, detail="Workout plan service not available")
+    
+    facets_key = ("difficulties", workout_plan_service.catalog_version)
+    cached_body = _plan_facets_cache.get(facets_key)
+    if cached_body is not None:
+        return Response(content=cached_body, media_type="application/json")
+    
+    workout_service = workout_plan_service
+    
+    # Collect difficulties in first-seen order; dict keys act as an ordered set
+    difficulties = {}
+    
+    # Get difficulties from database
     try:
-        # Import WorkoutPlanService here to avoid circular imports
-        from ..services.workout_plan_service import WorkoutPlanService
-        
-        workout_service = WorkoutPlanService()
-        
-        # Get difficulties from database
-        db_difficulties = set()
-        try:
-            db_plans = await workout_service.get_all_plans()
-            for plan_id, plan_data in db_plans.items():
-                metadata = await workout_service.get_plan_metadata(plan_id)
-                if metadata and "metadata" in metadata:
-                    difficulty = metadata["metadata"].get("difficulty")
-                    if difficulty:
-                        db_difficulties.add(difficulty)
-        except Exception as e:
-            print(f"⚠️ Could not load difficulties from database: {e}")
-        
-        # Get difficulties from JSON file
-        json_difficulties = set()
-        try:
-            with open("app/data/workout_plans.json", "r") as f:
-                json_plans = json.load(f)
-                for plan_id, plan_data in json_plans.items():
-                    # Default difficulties for JSON plans
-                    json_difficulties.add("intermediate")
-        except FileNotFoundError:
-            pass
-        
-        # Combine all difficulties
-        all_difficulties = list(db_difficulties.union(json_difficulties))
-        
-        return APIResponse(
-            success=True,
-            message="Workout plan difficulties retrieved successfully",
-            data={
-                "difficulties": all_difficulties,
-                "total_difficulties": len(all_difficulties)
-            }
+        meta_by_id = await workout_service.get_all_plan_metadata()
+        difficulties = dict.fromkeys(
+            difficulty for metadata in meta_by_id.values()
+            if (difficulty := (metadata["metadata"] or {}).get("difficulty"))
         )
-        
     except Exception as e:
-        print(f"Error getting workout plan difficulties: {e}")
-        raise HTTPException(status_code=500, detail="Internal server error") 
\ No newline at end of file
+        logger.warning("⚠️ Could not load difficulties from database: %s", e)
+    
+    # Default difficulty for JSON plans
+    if _JSON_PLANS:
+        difficulties.setdefault("intermediate")
+    
+    all_difficulties = list(difficulties)
+    
+    return _cache_payload(_plan_facets_cache, facets_key, {
+        "success": True,
+        "message": "Workout plan difficulties retrieved successfully",
+        "data": {
+            "difficulties": all_difficulties,
+            "total_difficulties": len(all_difficulties)
+        }
+    })
\ No newline at end of file
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, ConfigDict
+from typing import List, Dict, Any
 from datetime import datetime
 
 # User Schemas
@@ -10,30 +10,29 @@ class UserBase(BaseModel):
     height: float
     fitness_goals: str
     fitness_goal_type: str
-    injuries_limitations: Optional[str] = None
+    injuries_limitations: str | None = None
 
 class UserCreate(UserBase):
     pass
 
 class UserUpdate(BaseModel):
-    name: Optional[str] = None
-    age: Optional[int] = None
-    weight: Optional[float] = None
-    height: Optional[float] = None
-    fitness_goals: Optional[str] = None
-    fitness_goal_type: Optional[str] = None
-    injuries_limitations: Optional[str] = None
+    name: str | None = None
+    age: int | None = None
+    weight: float | None = None
+    height: float | None = None
+    fitness_goals: str | None = None
+    fitness_goal_type: str | None = None
+    injuries_limitations: str | None = None
 
 class User(UserBase):
     id: int
-    supabase_user_id: Optional[str] = None
-    email: Optional[str] = None
+    supabase_user_id: str | None = None
+    email: str | None = None
     email_verified: bool = False
     created_at: datetime
-    updated_at: Optional[datetime] = None
+    updated_at: datetime | None = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Workout Schemas
 class WorkoutLogBase(BaseModel):
@@ -41,7 +40,7 @@ class WorkoutLogBase(BaseModel):
     sets: int
     reps: int
     weight: float
-    notes: Optional[str] = None
+    notes: str | None = None
 
 class WorkoutLogCreate(WorkoutLogBase):
     pass
@@ -51,8 +50,7 @@ class WorkoutLog(WorkoutLogBase):
     user_id: int
     workout_date: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class WorkoutPlan(BaseModel):
     week_plan: List[Dict[str, Any]]
@@ -75,14 +73,13 @@ class MealPlan(MealPlanBase):
     user_id: int
     plan_date: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Chat Schemas
 class ChatMessageBase(BaseModel):
     content: str
     role: str = "user"
-    agent_type: Optional[str] = None
+    agent_type: str | None = None
 
 class ChatMessageCreate(ChatMessageBase):
     pass
@@ -92,24 +89,23 @@ class ChatMessage(ChatMessageBase):
     session_id: int
     timestamp: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class ChatRequest(BaseModel):
     message: str
     user_id: int
-    session_id: Optional[str] = None
+    session_id: str | None = None
 
 class ChatResponse(BaseModel):
     success: bool
     message: str
-    data: Optional[Dict[str, Any]] = None
+    data: Dict[str, Any] | None = None
 
 # API Response Schemas
 class APIResponse(BaseModel):
     success: bool
     message: str
-    data: Optional[Any] = None
+    data: Any | None = None
 
 class ErrorResponse(BaseModel):
     detail: str 
@@ -127,27 +123,27 @@ class AuthSignUpRequest(BaseModel):
     height: float
     fitness_goals: str
     fitness_goal_type: str
-    injuries_limitations: Optional[str] = None
+    injuries_limitations: str | None = None
 
 class OAuthRequest(BaseModel):
     provider: str  # "google" or "apple"
     access_token: str
-    user_info: Optional[Dict[str, Any]] = None
+    user_info: Dict[str, Any] | None = None
 
 class AuthResponse(BaseModel):
     access_token: str
     token_type: str = "bearer"
     user: User
-    expires_in: Optional[int] = None
+    expires_in: int | None = None
 
 class TokenVerificationRequest(BaseModel):
     token: str
 
 class TokenVerificationResponse(BaseModel):
     valid: bool
-    user_id: Optional[str] = None
-    email: Optional[str] = None
-    email_verified: Optional[bool] = None
+    user_id: str | None = None
+    email: str | None = None
+    email_verified: bool | None = None
 
 class PasswordResetRequest(BaseModel):
     email: str
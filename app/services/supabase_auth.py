@@ -8,10 +8,61 @@ from ..config import settings
 import jwt
 from typing import Optional, Dict, Any
 import logging
+import time
 import uuid
+from dataclasses import dataclass
+from ..utils.ttl_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
+_JWT_ALGORITHMS = ["HS256"]
+_JWT_AUDIENCE = "authenticated"
+
+# Verified token claims, shared across service instances. Clients send the same
+# session token on every call, so a short TTL avoids re-decoding it and, without
+# a JWT secret, a Supabase get_user round-trip per request.
+_verified_tokens = TTLCache(ttl_seconds=30, maxsize=4096)
+
+
+@dataclass(slots=True)
+class _FallbackUser:
+    """Stand-in for a Supabase user when auth falls back to a local account"""
+    id: str
+    email: Optional[str]
+    email_confirmed_at: None = None
+
+
+@dataclass(slots=True)
+class _FallbackSession:
+    """Stand-in for a Supabase session carrying a local token"""
+    access_token: str
+    expires_in: int = 3600
+
+
+@dataclass(slots=True)
+class _FallbackAuthResponse:
+    """Stand-in for a Supabase auth response"""
+    user: Optional[_FallbackUser]
+    session: Optional[_FallbackSession]
+
+
+def _make_fallback_signup(email: str) -> _FallbackAuthResponse:
+    """Build a local signup response with a fresh local user ID"""
+    local_user_id = f"local_{uuid.uuid4().hex}"
+    return _FallbackAuthResponse(
+        user=_FallbackUser(id=local_user_id, email=email),
+        session=_FallbackSession(access_token=f"local_token_{local_user_id}")
+    )
+
+
+def _make_fallback_signin() -> _FallbackAuthResponse:
+    """Build a local signin response carrying only a session"""
+    local_user_id = f"local_{uuid.uuid4().hex}"
+    return _FallbackAuthResponse(
+        user=None,
+        session=_FallbackSession(access_token=f"local_token_{local_user_id}")
+    )
+
 class SupabaseAuthService:
     def __init__(self):
         if not settings.SUPABASE_URL or not settings.SUPABASE_ANON_KEY:
@@ -19,23 +70,23 @@ class SupabaseAuthService:
         
         self.supabase_url = settings.SUPABASE_URL
         self.supabase_anon_key = settings.SUPABASE_ANON_KEY
+        # Per instance on purpose: the auth client holds the signed-in user's
+        # session, so it must not be shared across requests
         self.supabase: Optional[Client] = None
-        self._client_initialized = False
         logger.info("Supabase Auth Service initialized (lazy loading)")
     
     def _get_client(self) -> Client:
         """Lazy initialization of Supabase client"""
-        if not self._client_initialized:
+        if self.supabase is None:
             try:
-                logger.info(f"Creating Supabase client with URL: {self.supabase_url}")
-                logger.info(f"Anon key starts with: {self.supabase_anon_key[:20]}...")
+                logger.info("Creating Supabase client with URL: %s", self.supabase_url)
+                logger.info("Anon key starts with: %s...", self.supabase_anon_key[:20])
                 
                 self.supabase = create_client(self.supabase_url, self.supabase_anon_key)
-                self._client_initialized = True
                 logger.info("✅ Supabase client initialized successfully")
             except Exception as e:
-                logger.error(f"❌ Failed to initialize Supabase client: {str(e)}")
-                logger.error(f"Error type: {type(e).__name__}")
+                logger.error("❌ Failed to initialize Supabase client: %s", e)
+                logger.error("Error type: %s", type(e).__name__)
                 # Don't raise here, let the calling methods handle it
                 return None
         return self.supabase
@@ -43,28 +94,17 @@ class SupabaseAuthService:
     async def sign_up_with_email(self, email: str, password: str, user_data: Dict[str, Any]):
         """Sign up user with email/password"""
         try:
-            logger.info(f"🔍 Starting signup process for: {email}")
+            logger.info("🔍 Starting signup process for: %s", email)
             
             client = self._get_client()
             if client is None:
                 # Fallback: create local user ID and return mock response
                 logger.warning("❌ Supabase client unavailable, using fallback signup")
-                local_user_id = f"local_{uuid.uuid4().hex}"
-                return type('obj', (object,), {
-                    'user': type('obj', (object,), {
-                        'id': local_user_id,
-                        'email': email,
-                        'email_confirmed_at': None
-                    })(),
-                    'session': type('obj', (object,), {
-                        'access_token': f"local_token_{local_user_id}",
-                        'expires_in': 3600
-                    })()
-                })()
+                return _make_fallback_signup(email)
             
             # Try to sign up with Supabase Auth
-            logger.info(f"📡 Attempting Supabase Auth signup for: {email}")
-            logger.info(f"📡 User data: {user_data}")
+            logger.info("📡 Attempting Supabase Auth signup for: %s", email)
+            logger.info("📡 User data: %s", user_data)
             
             try:
                 response = client.auth.sign_up({
@@ -74,66 +114,33 @@ class SupabaseAuthService:
                         "data": user_data
                     }
                 })
-                logger.info(f"📡 Supabase Auth response received: {type(response)}")
+                logger.info("📡 Supabase Auth response received: %s", type(response))
                 
                 # Check if response is None or invalid
                 if response is None:
                     logger.warning("❌ Supabase Auth returned None, using fallback")
-                    local_user_id = f"local_{uuid.uuid4().hex}"
-                    return type('obj', (object,), {
-                        'user': type('obj', (object,), {
-                            'id': local_user_id,
-                            'email': email,
-                            'email_confirmed_at': None
-                        })(),
-                        'session': type('obj', (object,), {
-                            'access_token': f"local_token_{local_user_id}",
-                            'expires_in': 3600
-                        })()
-                    })()
+                    return _make_fallback_signup(email)
                 
                 # Validate response structure
                 if not hasattr(response, 'user') or not hasattr(response, 'session'):
-                    logger.warning(f"❌ Supabase Auth response missing required attributes: {response}")
-                    local_user_id = f"local_{uuid.uuid4().hex}"
-                    return type('obj', (object,), {
-                        'user': type('obj', (object,), {
-                            'id': local_user_id,
-                            'email': email,
-                            'email_confirmed_at': None
-                        })(),
-                        'session': type('obj', (object,), {
-                            'access_token': f"local_token_{local_user_id}",
-                            'expires_in': 3600
-                        })()
-                    })()
+                    logger.warning("❌ Supabase Auth response missing required attributes: %s", response)
+                    return _make_fallback_signup(email)
                 
-                logger.info(f"✅ User signed up successfully with Supabase Auth: {email}")
-                logger.info(f"✅ User ID: {response.user.id}")
-                logger.info(f"✅ Session token: {response.session.access_token[:20]}...")
+                logger.info("✅ User signed up successfully with Supabase Auth: %s", email)
+                logger.info("✅ User ID: %s", response.user.id)
+                logger.info("✅ Session token: %s...", response.session.access_token[:20])
                 return response
                 
             except Exception as auth_error:
-                logger.error(f"❌ Supabase Auth signup failed: {str(auth_error)}")
-                logger.error(f"❌ Error type: {type(auth_error).__name__}")
+                logger.error("❌ Supabase Auth signup failed: %s", auth_error)
+                logger.error("❌ Error type: %s", type(auth_error).__name__)
                 raise auth_error
             
         except Exception as e:
-            logger.error(f"❌ Sign up failed for {email}: {str(e)}")
+            logger.error("❌ Sign up failed for %s: %s", email, e)
             # Fallback: create local user ID and return mock response
             logger.warning("🔄 Using fallback signup due to error")
-            local_user_id = f"local_{uuid.uuid4().hex}"
-            return type('obj', (object,), {
-                'user': type('obj', (object,), {
-                    'id': local_user_id,
-                    'email': email,
-                    'email_confirmed_at': None
-                })(),
-                'session': type('obj', (object,), {
-                    'access_token': f"local_token_{local_user_id}",
-                    'expires_in': 3600
-                })()
-            })()
+            return _make_fallback_signup(email)
     
     async def sign_in_with_email(self, email: str, password: str):
         """Sign in user with email/password"""
@@ -142,16 +149,10 @@ class SupabaseAuthService:
             if client is None:
                 # Fallback: return mock response for existing users
                 logger.warning("Supabase client unavailable, using fallback signin")
-                local_user_id = f"local_{uuid.uuid4().hex}"
-                return type('obj', (object,), {
-                    'session': type('obj', (object,), {
-                        'access_token': f"local_token_{local_user_id}",
-                        'expires_in': 3600
-                    })()
-                })()
+                return _make_fallback_signin()
             
             # Try to sign in with Supabase Auth
-            logger.info(f"Attempting Supabase Auth signin for: {email}")
+            logger.info("Attempting Supabase Auth signin for: %s", email)
             response = client.auth.sign_in_with_password({
                 "email": email,
                 "password": password
@@ -160,39 +161,21 @@ class SupabaseAuthService:
             # Check if response is None or invalid
             if response is None:
                 logger.warning("Supabase Auth returned None, using fallback")
-                local_user_id = f"local_{uuid.uuid4().hex}"
-                return type('obj', (object,), {
-                    'session': type('obj', (object,), {
-                        'access_token': f"local_token_{local_user_id}",
-                        'expires_in': 3600
-                    })()
-                })()
+                return _make_fallback_signin()
             
             # Validate response structure
             if not hasattr(response, 'session'):
                 logger.warning("Supabase Auth response missing session attribute, using fallback")
-                local_user_id = f"local_{uuid.uuid4().hex}"
-                return type('obj', (object,), {
-                    'session': type('obj', (object,), {
-                        'access_token': f"local_token_{local_user_id}",
-                        'expires_in': 3600
-                    })()
-                })()
+                return _make_fallback_signin()
             
-            logger.info(f"User signed in successfully with Supabase Auth: {email}")
+            logger.info("User signed in successfully with Supabase Auth: %s", email)
             return response
             
         except Exception as e:
-            logger.error(f"Sign in failed for {email}: {str(e)}")
+            logger.error("Sign in failed for %s: %s", email, e)
             # Fallback: return mock response for existing users
             logger.warning("Using fallback signin due to error")
-            local_user_id = f"local_{uuid.uuid4().hex}"
-            return type('obj', (object,), {
-                'session': type('obj', (object,), {
-                    'access_token': f"local_token_{local_user_id}",
-                    'expires_in': 3600
-                })()
-            })()
+            return _make_fallback_signin()
     
     async def sign_in_with_oauth(self, provider: str, access_token: str):
         """Sign in with OAuth provider (Google/Apple)"""
@@ -206,10 +189,10 @@ class SupabaseAuthService:
                 "provider": provider,
                 "access_token": access_token
             })
-            logger.info(f"OAuth sign in successful for {provider}")
+            logger.info("OAuth sign in successful for %s", provider)
             return response
         except Exception as e:
-            logger.error(f"OAuth sign in failed for {provider}: {str(e)}")
+            logger.error("OAuth sign in failed for %s: %s", provider, e)
             raise
     
     async def verify_token(self, token: str) -> Optional[Dict[str, Any]]:
@@ -224,6 +207,13 @@ class SupabaseAuthService:
                     "email_verified": False
                 }
             
+            cached = _verified_tokens.get(token)
+            if cached is not None:
+                exp = cached.get("exp")
+                if exp is None or exp > time.time():
+                    return cached
+                _verified_tokens.invalidate(token)
+            
             if not settings.SUPABASE_JWT_SECRET:
                 logger.warning("SUPABASE_JWT_SECRET not configured, using Supabase client verification")
                 client = self._get_client()
@@ -233,22 +223,30 @@ class SupabaseAuthService:
                 
                 # Use Supabase client to verify token
                 user = client.auth.get_user(token)
-                return {
+                payload = {
                     "sub": user.user.id,
                     "email": user.user.email,
                     "email_verified": user.user.email_confirmed_at is not None
                 }
+                # Supabase has just vouched for the token, so its unverified exp
+                # is trustworthy; without one there is no safe expiry to cache to
+                exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+                if exp is not None:
+                    payload["exp"] = exp
+                    _verified_tokens.set(token, payload)
+                return payload
             
             # Verify with Supabase JWT secret
             payload = jwt.decode(
                 token,
                 settings.SUPABASE_JWT_SECRET,
-                algorithms=["HS256"],
-                audience="authenticated"
+                algorithms=_JWT_ALGORITHMS,
+                audience=_JWT_AUDIENCE
             )
+            _verified_tokens.set(token, payload)
             return payload
         except Exception as e:
-            logger.error(f"Token verification failed: {str(e)}")
+            logger.error("Token verification failed: %s", e)
             return None
     
     async def get_user(self, token: str):
@@ -262,24 +260,26 @@ class SupabaseAuthService:
             user = client.auth.get_user(token)
             return user
         except Exception as e:
-            logger.error(f"Failed to get user: {str(e)}")
+            logger.error("Failed to get user: %s", e)
             raise
     
     async def sign_out(self, token: str):
         """Sign out user"""
+        # Stop accepting the token here even if the Supabase call below fails
+        _verified_tokens.invalidate(token)
         try:
             client = self._get_client()
             if client is None:
                 logger.warning("Supabase client unavailable, using fallback signout")
-                return type('obj', (object,), {})()
+                return _FallbackAuthResponse(user=None, session=None)
             
             response = client.auth.sign_out()
             logger.info("User signed out successfully")
             return response
         except Exception as e:
-            logger.error(f"Sign out failed: {str(e)}")
+            logger.error("Sign out failed: %s", e)
             # Fallback: return empty response
-            return type('obj', (object,), {})()
+            return _FallbackAuthResponse(user=None, session=None)
     
     async def reset_password(self, email: str):
         """Send password reset email"""
@@ -290,8 +290,8 @@ class SupabaseAuthService:
                 raise Exception("Password reset not available in fallback mode")
             
             response = client.auth.reset_password_email(email)
-            logger.info(f"Password reset email sent to {email}")
+            logger.info("Password reset email sent to %s", email)
             return response
         except Exception as e:
-            logger.error(f"Password reset failed for {email}: {str(e)}")
+            logger.error("Password reset failed for %s: %s", email, e)
             raise
@@ -8,20 +8,62 @@ import os
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 import asyncio
+import logging
+import threading
 from supabase import create_client, Client
 from app.config import settings
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
 
 class WorkoutPlanService:
     """Service for managing workout plans in Supabase."""
+
+    # Snapshot of the active plan catalog shared by every instance, so
+    # back-to-back discovery calls reuse one read; the write methods below
+    # clear it.
+    _catalog_cache = TTLCache(ttl_seconds=30)
+    # Bumped on every write so callers can key their own caches on it
+    catalog_version = 0
+    # Individual plans and their metadata keyed by plan_id; plans are written
+    # once and read many times, and writes drop the affected entries.
+    _plan_cache = TTLCache(ttl_seconds=300)
+
+    @classmethod
+    def _invalidate_catalog(cls, plan_id: Optional[str] = None):
+        """Drop cached catalog reads, and the cached plan_id entries, after a write."""
+        cls.catalog_version += 1
+        cls._catalog_cache.clear()
+        if plan_id is not None:
+            cls._plan_cache.invalidate(("plan", plan_id))
+            cls._plan_cache.invalidate(("metadata", plan_id))
+    
+    # One Supabase client per process, shared by every instance. Only the
+    # PostgREST table API is used here, which keeps no per-user session state.
+    _client: Optional[Client] = None
+    _client_lock = threading.Lock()
     
     def __init__(self):
         """Initialize the Supabase client."""
-        # Use the settings instance directly
-        self.supabase: Client = create_client(
-            settings.SUPABASE_URL,
-            settings.SUPABASE_ANON_KEY
-        )
+        self.supabase: Client = self._shared_client()
         self.table_name = "workout_plans"
+
+    @classmethod
+    def _shared_client(cls) -> Client:
+        """Return the process-wide Supabase client, creating it on first use."""
+        if cls._client is None:
+            with cls._client_lock:
+                if cls._client is None:
+                    # Use the settings instance directly
+                    cls._client = create_client(
+                        settings.SUPABASE_URL,
+                        settings.SUPABASE_ANON_KEY
+                    )
+        return cls._client
+
+    async def _execute(self, query):
+        """Run a blocking supabase-py query in a worker thread so concurrent awaits overlap."""
+        return await asyncio.to_thread(query.execute)
     
     async def store_plan(self, plan_id: str, plan_data: Dict[str, Any], 
                          metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
@@ -46,11 +88,12 @@ class WorkoutPlanService:
             }
             
             # Insert the plan into the database
-            result = self.supabase.table(self.table_name).insert(plan_record).execute()
+            result = await self._execute(self.supabase.table(self.table_name).insert(plan_record))
             
             if result.data:
+                self._invalidate_catalog(plan_id)
                 stored_plan = result.data[0]
-                print(f"✅ Plan '{plan_id}' stored successfully in database")
+                logger.info("Plan '%s' stored successfully in database", plan_id)
                 return {
                     "success": True,
                     "plan_id": stored_plan["plan_id"],
@@ -61,7 +104,7 @@ class WorkoutPlanService:
                 raise Exception("No data returned from insert operation")
                 
         except Exception as e:
-            print(f"❌ Error storing plan '{plan_id}': {str(e)}")
+            logger.exception("Error storing plan '%s': %s", plan_id, e)
             raise Exception(f"Failed to store plan: {str(e)}")
     
     async def get_plan(self, plan_id: str) -> Optional[Dict[str, Any]]:
@@ -74,17 +117,22 @@ class WorkoutPlanService:
         Returns:
             The workout plan data or None if not found
         """
+        cached = self._plan_cache.get(("plan", plan_id))
+        if cached is not None:
+            return cached
+
         try:
-            result = self.supabase.table(self.table_name).select("*").eq("plan_id", plan_id).eq("is_active", True).execute()
+            result = await self._execute(self.supabase.table(self.table_name).select("plan_data").eq("plan_id", plan_id).eq("is_active", True))
             
             if result.data:
                 plan_record = result.data[0]
+                self._plan_cache.set(("plan", plan_id), plan_record["plan_data"])
                 return plan_record["plan_data"]
             else:
                 return None
                 
         except Exception as e:
-            print(f"❌ Error retrieving plan '{plan_id}': {str(e)}")
+            logger.exception("Error retrieving plan '%s': %s", plan_id, e)
             return None
     
     async def get_all_plans(self) -> List[Dict[str, Any]]:
@@ -94,21 +142,73 @@ class WorkoutPlanService:
         Returns:
             List of all active workout plans
         """
+        cached = self._catalog_cache.get("plans")
+        if cached is not None:
+            return cached
+
         try:
-            result = self.supabase.table(self.table_name).select("*").eq("is_active", True).order("created_at", desc=True).execute()
+            result = await self._execute(self.supabase.table(self.table_name).select("plan_id, plan_data").eq("is_active", True).order("created_at", desc=True))
             
-            if result.data:
-                plans = {}
-                for plan_record in result.data:
-                    plan_id = plan_record["plan_id"]
-                    plans[plan_id] = plan_record["plan_data"]
-                
-                return plans
-            else:
-                return {}
+            plans = {}
+            for plan_record in result.data or []:
+                plan_id = plan_record["plan_id"]
+                plans[plan_id] = plan_record["plan_data"]
+
+            self._catalog_cache.set("plans", plans)
+            return plans
                 
         except Exception as e:
-            print(f"❌ Error retrieving all plans: {str(e)}")
+            logger.exception("Error retrieving all plans: %s", e)
+            return {}
+    
+    async def list_plans(self, category: Optional[str] = None, difficulty: Optional[str] = None,
+                         plan_type: Optional[str] = None, limit: int = 20) -> Dict[str, Dict[str, Any]]:
+        """
+        Retrieve active plans matching the given metadata filters, newest first.
+        
+        Filtering and the limit are applied by the database, so only matching
+        rows are fetched.
+        
+        Args:
+            category: Optional metadata category to match
+            difficulty: Optional metadata difficulty to match
+            plan_type: Optional metadata type to match
+            limit: Maximum number of plans to return
+            
+        Returns:
+            Dict mapping plan_id to its plan_data, metadata and timestamps
+        """
+        cache_key = ("list", category, difficulty, plan_type, limit)
+        cached = self._catalog_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        try:
+            query = self.supabase.table(self.table_name).select("plan_id, plan_data, metadata, created_at, updated_at").eq("is_active", True)
+            # One containment filter (@>) so the metadata GIN index applies
+            wanted = {
+                key: value
+                for key, value in (("category", category), ("difficulty", difficulty), ("type", plan_type))
+                if value
+            }
+            if wanted:
+                query = query.contains("metadata", wanted)
+            result = await self._execute(query.order("created_at", desc=True).limit(limit))
+
+            plans = {
+                plan_record["plan_id"]: {
+                    "plan_data": plan_record["plan_data"],
+                    "metadata": plan_record["metadata"],
+                    "created_at": plan_record["created_at"],
+                    "updated_at": plan_record["updated_at"]
+                }
+                for plan_record in result.data or []
+            }
+            self._catalog_cache.set(cache_key, plans)
+            return plans
+
+        except Exception as e:
+            logger.exception("Error listing plans: %s", e)
             return {}
     
     async def get_plans_by_category(self, category: str) -> List[Dict[str, Any]]:
@@ -123,7 +223,7 @@ class WorkoutPlanService:
         """
         try:
             # Query using JSONB containment operator
-            result = self.supabase.table(self.table_name).select("*").eq("is_active", True).contains("metadata", {"category": category}).execute()
+            result = await self._execute(self.supabase.table(self.table_name).select("plan_id, plan_data").eq("is_active", True).contains("metadata", {"category": category}))
             
             if result.data:
                 plans = {}
@@ -136,7 +236,30 @@ class WorkoutPlanService:
                 return {}
                 
         except Exception as e:
-            print(f"❌ Error retrieving plans by category '{category}': {str(e)}")
+            logger.exception("Error retrieving plans by category '%s': %s", category, e)
+            return {}
+    
+    async def get_plans_by_metadata(self, key: str, value: Any) -> Dict[str, Dict[str, Any]]:
+        """
+        Retrieve active plans whose metadata has key set to value.
+        
+        Uses JSONB containment (@>) so the jsonb_path_ops GIN index on
+        metadata is used; prefer this over metadata->> equality filters.
+        
+        Args:
+            key: Metadata key to match
+            value: Value the key must hold
+            
+        Returns:
+            Dict mapping plan_id to plan_data for matching plans
+        """
+        try:
+            result = await self._execute(self.supabase.table(self.table_name).select("plan_id, plan_data").eq("is_active", True).contains("metadata", {key: value}))
+            
+            return {plan_record["plan_id"]: plan_record["plan_data"] for plan_record in result.data or []}
+            
+        except Exception as e:
+            logger.exception("Error retrieving plans by metadata '%s': %s", key, e)
             return {}
     
     async def update_plan(self, plan_id: str, plan_data: Dict[str, Any], 
@@ -157,16 +280,17 @@ class WorkoutPlanService:
             if metadata:
                 update_data["metadata"] = metadata
             
-            result = self.supabase.table(self.table_name).update(update_data).eq("plan_id", plan_id).execute()
+            result = await self._execute(self.supabase.table(self.table_name).update(update_data).eq("plan_id", plan_id))
             
             if result.data:
-                print(f"✅ Plan '{plan_id}' updated successfully")
+                self._invalidate_catalog(plan_id)
+                logger.info("Plan '%s' updated successfully", plan_id)
                 return True
             else:
                 return False
                 
         except Exception as e:
-            print(f"❌ Error updating plan '{plan_id}': {str(e)}")
+            logger.exception("Error updating plan '%s': %s", plan_id, e)
             return False
     
     async def deactivate_plan(self, plan_id: str) -> bool:
@@ -180,16 +304,17 @@ class WorkoutPlanService:
             True if deactivation successful, False otherwise
         """
         try:
-            result = self.supabase.table(self.table_name).update({"is_active": False}).eq("plan_id", plan_id).execute()
+            result = await self._execute(self.supabase.table(self.table_name).update({"is_active": False}).eq("plan_id", plan_id))
             
             if result.data:
-                print(f"✅ Plan '{plan_id}' deactivated successfully")
+                self._invalidate_catalog(plan_id)
+                logger.info("Plan '%s' deactivated successfully", plan_id)
                 return True
             else:
                 return False
                 
         except Exception as e:
-            print(f"❌ Error deactivating plan '{plan_id}': {str(e)}")
+            logger.exception("Error deactivating plan '%s': %s", plan_id, e)
             return False
     
     async def delete_plan(self, plan_id: str) -> bool:
@@ -203,16 +328,17 @@ class WorkoutPlanService:
             True if deletion successful, False otherwise
         """
         try:
-            result = self.supabase.table(self.table_name).delete().eq("plan_id", plan_id).execute()
+            result = await self._execute(self.supabase.table(self.table_name).delete().eq("plan_id", plan_id))
             
             if result.data:
-                print(f"✅ Plan '{plan_id}' deleted successfully")
+                self._invalidate_catalog(plan_id)
+                logger.info("Plan '%s' deleted successfully", plan_id)
                 return True
             else:
                 return False
                 
         except Exception as e:
-            print(f"❌ Error deleting plan '{plan_id}': {str(e)}")
+            logger.exception("Error deleting plan '%s': %s", plan_id, e)
             return False
     
     async def plan_exists(self, plan_id: str) -> bool:
@@ -226,10 +352,10 @@ class WorkoutPlanService:
             True if plan exists, False otherwise
         """
         try:
-            result = self.supabase.table(self.table_name).select("plan_id").eq("plan_id", plan_id).eq("is_active", True).execute()
+            result = await self._execute(self.supabase.table(self.table_name).select("plan_id").eq("plan_id", plan_id).eq("is_active", True).limit(1))
             return len(result.data) > 0
         except Exception as e:
-            print(f"❌ Error checking if plan '{plan_id}' exists: {str(e)}")
+            logger.exception("Error checking if plan '%s' exists: %s", plan_id, e)
             return False
     
     async def get_plan_metadata(self, plan_id: str) -> Optional[Dict[str, Any]]:
@@ -242,19 +368,57 @@ class WorkoutPlanService:
         Returns:
             Plan metadata or None if not found
         """
+        cached = self._plan_cache.get(("metadata", plan_id))
+        if cached is not None:
+            return cached
+
         try:
-            result = self.supabase.table(self.table_name).select("metadata, created_at, updated_at").eq("plan_id", plan_id).eq("is_active", True).execute()
+            result = await self._execute(self.supabase.table(self.table_name).select("metadata, created_at, updated_at").eq("plan_id", plan_id).eq("is_active", True))
             
             if result.data:
                 plan_record = result.data[0]
-                return {
+                metadata = {
                     "metadata": plan_record["metadata"],
                     "created_at": plan_record["created_at"],
                     "updated_at": plan_record["updated_at"]
                 }
+                self._plan_cache.set(("metadata", plan_id), metadata)
+                return metadata
             else:
                 return None
                 
         except Exception as e:
-            print(f"❌ Error retrieving metadata for plan '{plan_id}': {str(e)}")
+            logger.exception("Error retrieving metadata for plan '%s': %s", plan_id, e)
             return None
+
+    async def get_all_plan_metadata(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get metadata for all active plans in a single query.
+
+        Returns:
+            Dict mapping plan_id to the same shape returned by get_plan_metadata
+        """
+        cached = self._catalog_cache.get("metadata")
+        if cached is not None:
+            return cached
+
+        try:
+            result = await self._execute(self.supabase.table(self.table_name).select("plan_id, metadata, created_at, updated_at").eq("is_active", True))
+
+            meta_by_id = {
+                plan_record["plan_id"]: {
+                    "metadata": plan_record["metadata"],
+                    "created_at": plan_record["created_at"],
+                    "updated_at": plan_record["updated_at"]
+                }
+                for plan_record in result.data or []
+            }
+            self._catalog_cache.set("metadata", meta_by_id)
+            return meta_by_id
+
+        except Exception as e:
+            logger.exception("Error retrieving metadata for all plans: %s", e)
+            return {}
+
+# Global instance
+workout_plan_service = WorkoutPlanService()
@@ -6,68 +6,176 @@ This provides a 1:1 mapping between workout plans and the database for consisten
 """
 
 import json
+import logging
 import os
+import re
+from functools import lru_cache
+from types import MappingProxyType
 from typing import Dict, List, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from ..models import Exercise, ExerciseData
 
+logger = logging.getLogger(__name__)
+
+
+# Keyword tables for classifying database exercise names. Keywords are matched
+# as substrings of the lowercased name (so "lat" also matches "lateral"), and
+# categories are tried in order with the first match winning.
+_CATEGORY_KEYWORDS = (
+    ('push', frozenset({'bench', 'press', 'dip', 'fly'})),
+    ('pull', frozenset({'row', 'pull', 'curl', 'face pull'})),
+    ('legs', frozenset({'squat', 'leg', 'calf', 'lunge', 'thrust'})),
+    ('core', frozenset({'plank', 'ab', 'leg raise'})),
+)
+
+# Every matching muscle group is reported, in this order
+_MUSCLE_GROUP_KEYWORDS = (
+    ('chest', frozenset({'bench', 'chest', 'fly'})),
+    ('shoulders', frozenset({'press', 'shoulder', 'lateral', 'overhead'})),
+    ('triceps', frozenset({'tricep', 'dip', 'extension'})),
+    ('back', frozenset({'row', 'pull', 'lat'})),
+    ('biceps', frozenset({'curl', 'bicep'})),
+    ('quadriceps', frozenset({'squat', 'leg press', 'hack'})),
+    ('hamstrings', frozenset({'deadlift', 'leg curl'})),
+    ('calves', frozenset({'calf'})),
+    ('glutes', frozenset({'lunge', 'split'})),
+    ('core', frozenset({'plank', 'ab', 'leg raise'})),
+)
+
+# Compound exercises (multi-joint, multiple muscle groups)
+_COMPOUND_EXERCISES = (
+    'bench press', 'incline bench press', 'overhead press', 'dumbbell shoulder press',
+    'pull-up', 'barbell row', 'seated cable row', 'dumbbell row',
+    'squat', 'front squat', 'hack squat', 'leg press',
+    'deadlift', 'romanian deadlift', 'hip thrust',
+    'dip', 'tricep dip', 'bulgarian split squat', 'walking lunge'
+)
+
+# Isolation exercises (single-joint, single muscle group focus)
+_ISOLATION_EXERCISES = (
+    'lateral raise', 'rear delt fly', 'face pull', 'rear delt raise',
+    'bicep curl', 'hammer curl', 'tricep pushdown', 'overhead tricep extension',
+    'cable chest fly', 'leg curl', 'standing calf raise', 'seated calf raise',
+    'plank', 'hanging leg raise', 'ab wheel'
+)
+
+# One alternation per list, so a single scan finds any of its names
+_COMPOUND_RE = re.compile('|'.join(map(re.escape, _COMPOUND_EXERCISES)))
+_ISOLATION_RE = re.compile('|'.join(map(re.escape, _ISOLATION_EXERCISES)))
+
+
+# Mapping from workout plan exercise names to database exercise names.
+# Several plan variants share one database exercise (e.g. both lateral raise
+# variants are "Lateral Raise").
+_EXERCISE_MAPPING = MappingProxyType({
+    # Push A exercises
+    "Barbell bench press": "Bench Press",
+    "Incline DB press": "Incline Dumbbell Press", 
+    "Standing barbell overhead press": "Overhead Press",
+    "DB lateral raise": "Lateral Raise",
+    "Cable or machine chest fly": "Cable Chest Fly",
+    "Cable triceps press-down": "Tricep Pushdown",
+    
+    # Pull A exercises
+    "Weighted pull-ups (or heavy lat pulldown)": "Pull-Up",
+    "Chest-supported row": "Barbell Row",
+    "Romanian deadlift": "Romanian Deadlift",
+    "Rear-delt cable fly": "Rear Delt Fly",
+    "Barbell curl": "Bicep Curl",
+    "Face pull": "Shoulder Face Pull",
+    
+    # Legs A exercises
+    "Back squat": "Squat",
+    "Leg press": "Leg Press",
+    "Seated or lying leg curl": "Leg Curl",
+    "Walking DB lunge": "Walking Lunge",
+    "Standing calf raise": "Standing Calf Raise",
+    "Ab wheel or plank": "Plank",
+    
+    # Push B exercises
+    "Incline barbell bench": "Incline Bench Press",
+    "DB shoulder press": "Dumbbell Shoulder Press",
+    "Machine or weighted dip": "Tricep Dip",
+    "DB lateral raise (slow eccentric)": "Lateral Raise",
+    "Overhead cable triceps extension": "Overhead Tricep Extension",
+    
+    # Pull B exercises
+    "Barbell row (hips just above parallel)": "Barbell Row",
+    "Neutral-grip pulldown": "Lat Pulldown",
+    "Seated cable row": "Seated Cable Row",
+    "Single-arm DB row": "Dumbbell Row",
+    "Rear-delt raise": "Rear Delt Fly",
+    "Hammer curl": "Hammer Curl",
+    
+    # Legs B exercises
+    "Front squat or hack squat": "Hack Squat",
+    "Hip thrust": "Hip Thrust",
+    "Bulgarian split squat": "Bulgarian Split Squat",
+    "Leg curl": "Leg Curl",
+    "Seated calf raise": "Seated Calf Raise",
+    "Hanging leg raise": "Hanging Leg Raise"
+})
+
+# Database to plan names; where several plan names share a database exercise,
+# the first one listed above is the primary.
+_REVERSE_MAPPING = MappingProxyType(
+    {db_name: plan_name for plan_name, db_name in reversed(tuple(_EXERCISE_MAPPING.items()))}
+)
+
+
+def _extract_plan_exercise_name(exercise_string: str) -> str:
+    """Exercise name from a plan line such as "1) Barbell bench press — 4×5–8"."""
+    # Remove number and closing parenthesis
+    without_number = exercise_string.split(") ", 1)[1] if ") " in exercise_string else exercise_string
+    # Remove sets/reps part
+    exercise_name = without_number.split(" — ")[0] if " — " in without_number else without_number
+    return exercise_name.strip()
+
+
+@lru_cache(maxsize=256)
+def _database_exercise_name(exercise_string: str) -> str:
+    """Database exercise name for a bare plan name or a full plan line."""
+    # Bare plan exercise names need no parsing
+    db_exercise = _EXERCISE_MAPPING.get(exercise_string)
+    if db_exercise is not None:
+        return db_exercise
+    
+    plan_exercise = _extract_plan_exercise_name(exercise_string)
+    return _EXERCISE_MAPPING.get(plan_exercise, plan_exercise)
+
+
+@lru_cache(maxsize=256)
+def _exercise_type(exercise_name: str) -> str:
+    """'compound' or 'isolation' for a plan or database exercise name."""
+    # First convert to database format if it's a plan exercise
+    db_exercise = _database_exercise_name(exercise_name) if " — " in exercise_name else exercise_name
+    exercise_lower = db_exercise.lower()
+    
+    # Check if it's a compound exercise
+    if _COMPOUND_RE.search(exercise_lower):
+        return 'compound'
+    
+    # Check if it's an isolation exercise
+    if _ISOLATION_RE.search(exercise_lower):
+        return 'isolation'
+    
+    # Default to compound if uncertain
+    return 'compound'
+
 
 class ExerciseConverter:
+    # Shared read-only tables, built once per process
+    exercise_mapping = _EXERCISE_MAPPING
+    reverse_mapping = _REVERSE_MAPPING
+
     def __init__(self):
-        # Mapping from workout plan exercise names to database exercise names
-        # This ensures 1:1 mapping between plan and database
-        self.exercise_mapping = {
-            # Push A exercises
-            "Barbell bench press": "Bench Press",
-            "Incline DB press": "Incline Dumbbell Press", 
-            "Standing barbell overhead press": "Overhead Press",
-            "DB lateral raise": "Lateral Raise",
-            "Cable or machine chest fly": "Cable Chest Fly",
-            "Cable triceps press-down": "Tricep Pushdown",
-            
-            # Pull A exercises
-            "Weighted pull-ups (or heavy lat pulldown)": "Pull-Up",
-            "Chest-supported row": "Barbell Row",
-            "Romanian deadlift": "Romanian Deadlift",
-            "Rear-delt cable fly": "Rear Delt Fly",
-            "Barbell curl": "Bicep Curl",
-            "Face pull": "Shoulder Face Pull",
-            
-            # Legs A exercises
-            "Back squat": "Squat",
-            "Leg press": "Leg Press",
-            "Seated or lying leg curl": "Leg Curl",
-            "Walking DB lunge": "Walking Lunge",
-            "Standing calf raise": "Standing Calf Raise",
-            "Ab wheel or plank": "Plank",
-            
-            # Push B exercises
-            "Incline barbell bench": "Incline Bench Press",
-            "DB shoulder press": "Dumbbell Shoulder Press",
-            "Machine or weighted dip": "Tricep Dip",
-            "DB lateral raise (slow eccentric)": "Lateral Raise",
-            "Overhead cable triceps extension": "Overhead Tricep Extension",
-            
-            # Pull B exercises
-            "Barbell row (hips just above parallel)": "Barbell Row",
-            "Neutral-grip pulldown": "Lat Pulldown",
-            "Seated cable row": "Seated Cable Row",
-            "Single-arm DB row": "Dumbbell Row",
-            "Rear-delt raise": "Rear Delt Fly",
-            "Hammer curl": "Hammer Curl",
-            
-            # Legs B exercises
-            "Front squat or hack squat": "Hack Squat",
-            "Hip thrust": "Hip Thrust",
-            "Bulgarian split squat": "Bulgarian Split Squat",
-            "Leg curl": "Leg Curl",
-            "Seated calf raise": "Seated Calf Raise",
-            "Hanging leg raise": "Hanging Leg Raise"
+        # Category and muscle groups for each database exercise, in mapping order
+        self._exercise_meta = {
+            db_exercise_name: (self._get_exercise_category(db_exercise_name), self._get_muscle_groups(db_exercise_name))
+            for db_exercise_name in dict.fromkeys(self.exercise_mapping.values())
         }
-        
-        # Reverse mapping for database to plan
-        self.reverse_mapping = {v: k for k, v in self.exercise_mapping.items()}
     
     def plan_to_database(self, plan_exercise: str) -> str:
         """
@@ -103,11 +211,7 @@ class ExerciseConverter:
         Returns:
             Exercise name (e.g., "Barbell bench press")
         """
-        # Remove number and closing parenthesis
-        without_number = exercise_string.split(") ", 1)[1] if ") " in exercise_string else exercise_string
-        # Remove sets/reps part
-        exercise_name = without_number.split(" — ")[0] if " — " in without_number else without_number
-        return exercise_name.strip()
+        return _extract_plan_exercise_name(exercise_string)
     
     def get_database_exercise_name(self, exercise_string: str) -> str:
         """
@@ -119,8 +223,7 @@ class ExerciseConverter:
         Returns:
             Database exercise name (e.g., "Bench Press")
         """
-        plan_exercise = self.extract_plan_exercise_name(exercise_string)
-        return self.plan_to_database(plan_exercise)
+        return _database_exercise_name(exercise_string)
     
     async def ensure_exercises_exist(self, db: AsyncSession) -> List[str]:
         """
@@ -133,28 +236,29 @@ class ExerciseConverter:
         Returns:
             List of exercise names that were created
         """
-        created_exercises = []
-        
-        # Get all existing exercises from database
-        result = await db.execute(text("SELECT name FROM exercises"))
-        existing_exercises = {row.name for row in result.fetchall()}
+        rows = [
+            {
+                "name": db_exercise_name,
+                "category": category,
+                "description": f"Exercise: {db_exercise_name}",
+                "muscle_groups": muscle_groups
+            }
+            for db_exercise_name, (category, muscle_groups) in self._exercise_meta.items()
+        ]
         
-        # Check which exercises need to be created
-        for db_exercise_name in self.exercise_mapping.values():
-            if db_exercise_name not in existing_exercises:
-                # Create the exercise
-                new_exercise = Exercise(
-                    name=db_exercise_name,
-                    category=self._get_exercise_category(db_exercise_name),
-                    description=f"Exercise: {db_exercise_name}",
-                    muscle_groups=self._get_muscle_groups(db_exercise_name)
-                )
-                db.add(new_exercise)
-                created_exercises.append(db_exercise_name)
+        # Insert every mapped exercise in one statement; existing names are skipped
+        insert = sqlite_insert if db.bind.dialect.name == "sqlite" else pg_insert
+        result = await db.execute(
+            insert(Exercise)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=["name"])
+            .returning(Exercise.name)
+        )
+        created_exercises = list(result.scalars())
         
         if created_exercises:
             await db.commit()
-            print(f"Created {len(created_exercises)} new exercises: {created_exercises}")
+            logger.info("Created %s new exercises: %s", len(created_exercises), created_exercises)
         
         return created_exercises
     
@@ -162,42 +266,19 @@ class ExerciseConverter:
         """Get exercise category based on exercise name."""
         exercise_lower = exercise_name.lower()
         
-        if any(word in exercise_lower for word in ['bench', 'press', 'dip', 'fly']):
-            return 'push'
-        elif any(word in exercise_lower for word in ['row', 'pull', 'curl', 'face pull']):
-            return 'pull'
-        elif any(word in exercise_lower for word in ['squat', 'leg', 'calf', 'lunge', 'thrust']):
-            return 'legs'
-        elif any(word in exercise_lower for word in ['plank', 'ab', 'leg raise']):
-            return 'core'
-        else:
-            return 'other'
+        for category, keywords in _CATEGORY_KEYWORDS:
+            if any(word in exercise_lower for word in keywords):
+                return category
+        return 'other'
     
     def _get_muscle_groups(self, exercise_name: str) -> List[str]:
         """Get muscle groups for an exercise."""
         exercise_lower = exercise_name.lower()
-        muscle_groups = []
-        
-        if any(word in exercise_lower for word in ['bench', 'chest', 'fly']):
-            muscle_groups.append('chest')
-        if any(word in exercise_lower for word in ['press', 'shoulder', 'lateral', 'overhead']):
-            muscle_groups.append('shoulders')
-        if any(word in exercise_lower for word in ['tricep', 'dip', 'extension']):
-            muscle_groups.append('triceps')
-        if any(word in exercise_lower for word in ['row', 'pull', 'lat']):
-            muscle_groups.append('back')
-        if any(word in exercise_lower for word in ['curl', 'bicep']):
-            muscle_groups.append('biceps')
-        if any(word in exercise_lower for word in ['squat', 'leg press', 'hack']):
-            muscle_groups.append('quadriceps')
-        if any(word in exercise_lower for word in ['deadlift', 'leg curl']):
-            muscle_groups.append('hamstrings')
-        if any(word in exercise_lower for word in ['calf']):
-            muscle_groups.append('calves')
-        if any(word in exercise_lower for word in ['lunge', 'split']):
-            muscle_groups.append('glutes')
-        if any(word in exercise_lower for word in ['plank', 'ab', 'leg raise']):
-            muscle_groups.append('core')
+        muscle_groups = [
+            muscle_group
+            for muscle_group, keywords in _MUSCLE_GROUP_KEYWORDS
+            if any(word in exercise_lower for word in keywords)
+        ]
         
         return muscle_groups if muscle_groups else ['general']
     
@@ -211,39 +292,7 @@ class ExerciseConverter:
         Returns:
             'compound' or 'isolation'
         """
-        # First convert to database format if it's a plan exercise
-        db_exercise = self.get_database_exercise_name(exercise_name) if " — " in exercise_name else exercise_name
-        exercise_lower = db_exercise.lower()
-        
-        # Compound exercises (multi-joint, multiple muscle groups)
-        compound_exercises = [
-            'bench press', 'incline bench press', 'overhead press', 'dumbbell shoulder press',
-            'pull-up', 'barbell row', 'seated cable row', 'dumbbell row',
-            'squat', 'front squat', 'hack squat', 'leg press',
-            'deadlift', 'romanian deadlift', 'hip thrust',
-            'dip', 'tricep dip', 'bulgarian split squat', 'walking lunge'
-        ]
-        
-        # Check if it's a compound exercise
-        for compound in compound_exercises:
-            if compound in exercise_lower:
-                return 'compound'
-        
-        # Isolation exercises (single-joint, single muscle group focus)
-        isolation_exercises = [
-            'lateral raise', 'rear delt fly', 'face pull', 'rear delt raise',
-            'bicep curl', 'hammer curl', 'tricep pushdown', 'overhead tricep extension',
-            'cable chest fly', 'leg curl', 'standing calf raise', 'seated calf raise',
-            'plank', 'hanging leg raise', 'ab wheel'
-        ]
-        
-        # Check if it's an isolation exercise
-        for isolation in isolation_exercises:
-            if isolation in exercise_lower:
-                return 'isolation'
-        
-        # Default to compound if uncertain
-        return 'compound'
+        return _exercise_type(exercise_name)
     
     def get_rest_time(self, exercise_name: str) -> int:
         """
@@ -255,7 +304,7 @@ class ExerciseConverter:
         Returns:
             Rest time in seconds
         """
-        exercise_type = self.get_exercise_type(exercise_name)
+        exercise_type = _exercise_type(exercise_name)
         return 120 if exercise_type == 'compound' else 75  # 2 minutes for compound, 75 seconds for isolation
 
 
@@ -0,0 +1,55 @@
+"""
+TTL Cache
+
+Small in-process cache with per-entry expiry and LRU eviction, used to keep
+hot, rarely-changing responses out of the database path. Entries live only in
+this process, so writers must invalidate the keys they affect.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """LRU cache whose entries expire `ttl_seconds` after being set"""
+
+    def __init__(self, ttl_seconds: float, maxsize: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        # Lookup counters, to check a cache is earning its keep
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None if missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store value under key, evicting the least recently used entry if full"""
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop key from the cache if present"""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry"""
+        self._entries.clear()
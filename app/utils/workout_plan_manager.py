@@ -4,175 +4,310 @@ Workout Plan Manager
 Manages loading and accessing structured workout plans from JSON files.
 """
 
-import json
+import logging
 import os
-from typing import Dict, Any, Optional, List
+import re
+import sys
+from functools import cache, lru_cache, partial
+from types import MappingProxyType
+from typing import Dict, Any, Optional, List, Mapping, Sequence, Tuple
 from datetime import datetime
 
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# Weight-based measurements: an amount or range (hyphen or en dash) in g/kg,
+# mg/kg or ml/kg, e.g. "1.6–2.2 g/kg", "3 mg/kg", "30-40 ml/kg". A trailing
+# "/day" is left in place, so "2 mg/kg/day" becomes "<n>mg/day".
+_WEIGHT_AMOUNT = re.compile(r'(\d+\.?\d*)(?:[-–](\d+\.?\d*))?\s*(g|mg|ml)/kg')
+
+
+def _scale_match(match: re.Match, weight_kg: float) -> str:
+    """Replacement for one weight-based amount or range, scaled to weight_kg"""
+    low, high, unit = match.groups()
+    if high is None:
+        return f"{int(float(low) * weight_kg)}{unit}"
+    return f"{int(float(low) * weight_kg)}-{int(float(high) * weight_kg)}{unit}"
+
+
+@lru_cache(maxsize=2048)
+def _convert_single_text(text: str, weight_kg: float) -> str:
+    """Convert a single text string containing weight-based measurements"""
+    # One scan handles every unit; the callback branches on the match
+    return _WEIGHT_AMOUNT.sub(partial(_scale_match, weight_kg=weight_kg), text)
+
+# Daily macro range in g/kg of body weight, e.g. "1.6–2.2 g/kg/day"
+_MACRO_RANGE = re.compile(r'(\d+(?:\.\d+)?)\s*[-–]\s*(\d+(?:\.\d+)?)\s*g/kg')
+
+_MACROS = ("protein", "carbohydrate", "fat")
+
+
+def _macro_multipliers(text: Optional[str]) -> Optional[Tuple[float, float]]:
+    """(min, max) g/kg multipliers from a macro's nutrition text, or None if it has no range"""
+    match = _MACRO_RANGE.search(text) if text else None
+    return (float(match.group(1)), float(match.group(2))) if match else None
+
+
+def _scaled_macro_range(multipliers: Tuple[float, float], weight_kg: float) -> Dict[str, float]:
+    """Min, max and midpoint grams for a g/kg range at the given body weight"""
+    macro_min = multipliers[0] * weight_kg
+    macro_max = multipliers[1] * weight_kg
+    return {
+        "min": round(macro_min, 1),
+        "max": round(macro_max, 1),
+        "target": round((macro_min + macro_max) / 2, 1)
+    }
+
+# Separator used to convert many strings in a single pass; it can never be
+# part of a match because the patterns only span digits, dashes and whitespace
+_BATCH_SEPARATOR = "\x00"
+
+def _freeze(value: Any) -> Any:
+    """Recursively turn loaded JSON into read-only views (dict -> MappingProxyType, list -> tuple)
+    
+    Strings are interned along the way, so names repeated across goal types
+    share one object and compare by identity first.
+    """
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, dict):
+        return MappingProxyType({sys.intern(key): _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    """Plain, caller-owned copy of a frozen value (MappingProxyType -> dict, tuple -> list)"""
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+# Exercise name in a numbered plan line such as "1) Exercise Name — 4×5–8":
+# the text after the first ")" up to the next ")" or em dash
+_NUMBERED_NAME = re.compile(r'[^)]*\)([^)—]*)')
+
+# Mapping from JSON exercise names to database exercise names
+_EXERCISE_MAPPING = _freeze({
+    # Building Muscle exercises
+    "Barbell bench press": "Bench Press",
+    "Incline DB press": "Incline Dumbbell Press",
+    "Standing barbell overhead press": "Overhead Press",
+    "DB lateral raise": "Lateral Raise",
+    "Cable or machine chest fly": "Cable Chest Fly",
+    "Cable triceps press-down": "Tricep Pushdown",
+    "Weighted pull-ups": "Pull-Up",
+    "Chest-supported row": "Barbell Row",
+    "Romanian deadlift": "Romanian Deadlift",
+    "Rear-delt cable fly": "Rear Delt Fly",
+    "Barbell curl": "Bicep Curl",
+    "Face pull": "Shoulder Face Pull",
+    "Back squat": "Squat",
+    "Leg press": "Leg Press",
+    "Seated or lying leg curl": "Leg Curl",
+    "Walking DB lunge": "Walking Lunge",
+    "Standing calf raise": "Standing Calf Raise",
+    "Ab wheel or plank": "Plank",
+    "Incline barbell bench": "Incline Bench Press",
+    "DB shoulder press": "Dumbbell Shoulder Press",
+    "Machine or weighted dip": "Tricep Dip",
+    "Overhead cable triceps extension": "Overhead Tricep Extension",
+    "Barbell row": "Barbell Row",
+    "Neutral-grip pulldown": "Lat Pulldown",
+    "Seated cable row": "Seated Cable Row",
+    "Single-arm DB row": "Dumbbell Row",
+    "Rear-delt raise": "Rear Delt Fly",
+    "Hammer curl": "Hammer Curl",
+    "Front squat or hack squat": "Hack Squat",
+    "Hip thrust": "Hip Thrust",
+    "Bulgarian split squat": "Bulgarian Split Squat",
+    "Leg curl": "Leg Curl",
+    "Seated calf raise": "Seated Calf Raise",
+    "Hanging leg raise": "Hanging Leg Raise",
+    
+    # Weight Loss exercises
+    "Lat pulldown or pull-ups": "Lat Pulldown",
+    "Dumbbell lateral raise": "Lateral Raise",
+    "Barbell or cable curl": "Bicep Curl",
+    "Triceps pressdown": "Tricep Pushdown",
+    "One-arm dumbbell row": "Dumbbell Row",
+    
+    # Strength exercises
+    "Row variation": "Barbell Row",
+    "Hamstring accessory (RDL or curl)": "Leg Curl",
+    "Core bracing work": "Plank",
+    "Overhead press": "Overhead Press",
+    "Bench close-grip or paused": "Close-Grip Bench Press",
+    "Upper back pull (pulldown or pull-up)": "Lat Pulldown",
+    "Hip hinge accessory": "Romanian Deadlift",
+    "Back squat or front squat": "Squat",
+    "Competition bench press": "Bench Press",
+    "Lunge or split squat": "Walking Lunge",
+    "Row or face pull": "Shoulder Face Pull",
+    "Triceps accessory": "Tricep Extension",
+    "Deadlift variation (pause, tempo, or RDL)": "Romanian Deadlift",
+    "Bench secondary (touch-and-go, 2-count pause)": "Bench Press",
+    "Barbell or chest-supported row": "Barbell Row",
+    "Pull-ups or pulldowns": "Lat Pulldown",
+    "Posterior chain accessory": "Romanian Deadlift",
+    "Core anti-extension or anti-rotation": "Plank",
+    
+    # Endurance exercises (strength components)
+    "squat or split squat": "Squat",
+    "hip hinge": "Romanian Deadlift",
+    "push": "Bench Press",
+    "pull": "Lat Pulldown",
+    "calf or core": "Plank"
+})
+
+# Marks a trie node that completes a mapping key; "" never collides with a
+# single-character edge
+_TRIE_END = ""
+
+
+def _build_name_trie(mapping: Mapping[str, str]) -> Dict[str, Any]:
+    """Character trie over the lowercased mapping keys
+    
+    Each key's final node stores (-key length, position in mapping, database
+    name), so the smallest hit is the most specific (longest) key, with ties
+    going to the key listed first.
+    """
+    root: Dict[str, Any] = {}
+    for position, (json_name, db_name) in enumerate(mapping.items()):
+        node = root
+        for char in json_name.lower():
+            node = node.setdefault(char, {})
+        node.setdefault(_TRIE_END, (-len(json_name), position, db_name))
+    return root
+
+
+def _find_in_name_trie(root: Dict[str, Any], text: str) -> Optional[str]:
+    """Database name of the longest mapping key contained in text (already lowercased)"""
+    best = None
+    for start in range(len(text)):
+        node = root
+        for char in text[start:]:
+            node = node.get(char)
+            if node is None:
+                break
+            hit = node.get(_TRIE_END)
+            if hit is not None and (best is None or hit < best):
+                best = hit
+    return best[2] if best else None
+
+# Partial-match lookups walk a trie instead of scanning every key
+_NAME_TRIE = _build_name_trie(_EXERCISE_MAPPING)
+
+
+@lru_cache(maxsize=512)
+def _map_exercise_name(json_exercise_name: str) -> str:
+    """Database exercise name for a JSON plan line, or the bare name if unmapped"""
+    # Extract the exercise name from the format "1) Exercise Name — 4×5–8"
+    match = _NUMBERED_NAME.match(json_exercise_name)
+    exercise_part = match.group(1).strip() if match else json_exercise_name
+    
+    # Try to find exact match first
+    if exercise_part in _EXERCISE_MAPPING:
+        return _EXERCISE_MAPPING[exercise_part]
+    
+    # Try partial matches, most specific key first
+    db_name = _find_in_name_trie(_NAME_TRIE, exercise_part.lower())
+    if db_name is not None:
+        return db_name
+    
+    # If no match found, return the original exercise part
+    return exercise_part
+
 class WorkoutPlanManager:
     """Manages structured workout plans for different fitness goals"""
     
     def __init__(self):
-        self.plans = self._load_workout_plans()
-        self.exercise_mapping = self._create_exercise_mapping()
+        # Frozen so the shared data can't be corrupted; accessors hand out plain
+        # copies (see _thaw) that serialize anywhere and are the caller's to edit
+        self.plans = _freeze(self._load_workout_plans())
+        self.exercise_mapping = _EXERCISE_MAPPING
+        # Week plans are identical for every user with the same goal type, so
+        # parse each weekly split and map its exercise names once, up front
+        self._week_plans: Dict[str, List[Dict[str, Any]]] = {
+            goal_type: self._build_week_plan(goal_type) for goal_type in self.plans
+        }
+        # Nutrition targets repeat for every user with the same goal type and
+        # weight; the cache lives on the instance and holds frozen results
+        self._nutrition_targets = lru_cache(maxsize=1024)(self._compute_nutrition_targets)
+    
+    @classmethod
+    @cache
+    def instance(cls) -> "WorkoutPlanManager":
+        """Return the process-wide manager, loading the plans on first use"""
+        return cls()
     
     def _load_workout_plans(self) -> Dict[str, Any]:
         """Load workout plans from JSON file"""
         try:
             json_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'workout_plans.json')
-            with open(json_path, 'r') as f:
-                return json.load(f)
+            with open(json_path, 'rb') as f:
+                return orjson.loads(f.read())
         except Exception as e:
-            print(f"Error loading workout plans: {e}")
+            logger.exception("Error loading workout plans: %s", e)
             return {}
     
-    def _create_exercise_mapping(self) -> Dict[str, str]:
-        """Create mapping from JSON exercise names to database exercise names"""
-        return {
-            # Building Muscle exercises
-            "Barbell bench press": "Bench Press",
-            "Incline DB press": "Incline Dumbbell Press",
-            "Standing barbell overhead press": "Overhead Press",
-            "DB lateral raise": "Lateral Raise",
-            "Cable or machine chest fly": "Cable Chest Fly",
-            "Cable triceps press-down": "Tricep Pushdown",
-            "Weighted pull-ups": "Pull-Up",
-            "Chest-supported row": "Barbell Row",
-            "Romanian deadlift": "Romanian Deadlift",
-            "Rear-delt cable fly": "Rear Delt Fly",
-            "Barbell curl": "Bicep Curl",
-            "Face pull": "Shoulder Face Pull",
-            "Back squat": "Squat",
-            "Leg press": "Leg Press",
-            "Seated or lying leg curl": "Leg Curl",
-            "Walking DB lunge": "Walking Lunge",
-            "Standing calf raise": "Standing Calf Raise",
-            "Ab wheel or plank": "Plank",
-            "Incline barbell bench": "Incline Bench Press",
-            "DB shoulder press": "Dumbbell Shoulder Press",
-            "Machine or weighted dip": "Tricep Dip",
-            "Overhead cable triceps extension": "Overhead Tricep Extension",
-            "Barbell row": "Barbell Row",
-            "Neutral-grip pulldown": "Lat Pulldown",
-            "Seated cable row": "Seated Cable Row",
-            "Single-arm DB row": "Dumbbell Row",
-            "Rear-delt raise": "Rear Delt Fly",
-            "Hammer curl": "Hammer Curl",
-            "Front squat or hack squat": "Hack Squat",
-            "Hip thrust": "Hip Thrust",
-            "Bulgarian split squat": "Bulgarian Split Squat",
-            "Leg curl": "Leg Curl",
-            "Seated calf raise": "Seated Calf Raise",
-            "Hanging leg raise": "Hanging Leg Raise",
-            
-            # Weight Loss exercises
-            "Chest-supported row": "Barbell Row",
-            "Lat pulldown or pull-ups": "Lat Pulldown",
-            "Dumbbell lateral raise": "Lateral Raise",
-            "Barbell or cable curl": "Bicep Curl",
-            "Triceps pressdown": "Tricep Pushdown",
-            "One-arm dumbbell row": "Dumbbell Row",
-            "Machine or weighted dip": "Tricep Dip",
-            "Seated cable row": "Seated Cable Row",
-            "Rear-delt raise": "Rear Delt Fly",
-            "Overhead cable triceps extension": "Overhead Tricep Extension",
-            
-            # Strength exercises
-            "Row variation": "Barbell Row",
-            "Hamstring accessory (RDL or curl)": "Leg Curl",
-            "Core bracing work": "Plank",
-            "Overhead press": "Overhead Press",
-            "Bench close-grip or paused": "Close-Grip Bench Press",
-            "Upper back pull (pulldown or pull-up)": "Lat Pulldown",
-            "Hip hinge accessory": "Romanian Deadlift",
-            "Back squat or front squat": "Squat",
-            "Competition bench press": "Bench Press",
-            "Lunge or split squat": "Walking Lunge",
-            "Row or face pull": "Shoulder Face Pull",
-            "Triceps accessory": "Tricep Extension",
-            "Deadlift variation (pause, tempo, or RDL)": "Romanian Deadlift",
-            "Bench secondary (touch-and-go, 2-count pause)": "Bench Press",
-            "Barbell or chest-supported row": "Barbell Row",
-            "Pull-ups or pulldowns": "Lat Pulldown",
-            "Posterior chain accessory": "Romanian Deadlift",
-            "Core anti-extension or anti-rotation": "Plank",
-            
-            # Endurance exercises (strength components)
-            "squat or split squat": "Squat",
-            "hip hinge": "Romanian Deadlift",
-            "push": "Bench Press",
-            "pull": "Lat Pulldown",
-            "calf or core": "Plank"
-        }
+    def _section(self, goal_type: str, key: str, default: Any) -> Any:
+        """Frozen view of one section of a goal type's plan, for internal use"""
+        plan = self.plans.get(goal_type)
+        return plan.get(key, default) if plan else default
     
     def get_plan(self, goal_type: str) -> Optional[Dict[str, Any]]:
         """Get workout plan for a specific goal type"""
-        return self.plans.get(goal_type)
+        return _thaw(self.plans.get(goal_type))
     
     def get_overview(self, goal_type: str) -> str:
         """Get overview text for a goal type"""
-        plan = self.get_plan(goal_type)
-        return plan.get("overview", "") if plan else ""
+        return self._section(goal_type, "overview", "")
     
     def get_weekly_split(self, goal_type: str) -> List[str]:
         """Get weekly split for a goal type"""
-        plan = self.get_plan(goal_type)
-        return plan.get("weekly_split", []) if plan else []
+        return _thaw(self._section(goal_type, "weekly_split", ()))
     
     def get_global_rules(self, goal_type: str) -> List[Dict[str, str]]:
         """Get global rules for a goal type"""
-        plan = self.get_plan(goal_type)
-        return plan.get("global_rules", []) if plan else []
+        return _thaw(self._section(goal_type, "global_rules", ()))
     
     def get_days(self, goal_type: str) -> Dict[str, List[str]]:
         """Get workout days for a goal type"""
-        plan = self.get_plan(goal_type)
-        return plan.get("days", {}) if plan else {}
+        return _thaw(self._section(goal_type, "days", {}))
     
     def get_conditioning_and_recovery(self, goal_type: str) -> List[str]:
         """Get conditioning and recovery guidelines"""
-        plan = self.get_plan(goal_type)
-        return plan.get("conditioning_and_recovery", []) if plan else []
+        return _thaw(self._section(goal_type, "conditioning_and_recovery", ()))
     
     def get_nutrition(self, goal_type: str) -> Dict[str, Any]:
         """Get nutrition guidelines for a goal type"""
-        plan = self.get_plan(goal_type)
-        return plan.get("nutrition", {}) if plan else {}
+        return _thaw(self._section(goal_type, "nutrition", {}))
     
     def get_execution_checklist(self, goal_type: str) -> List[str]:
         """Get execution checklist for a goal type"""
-        plan = self.get_plan(goal_type)
-        return plan.get("execution_checklist", []) if plan else []
+        return _thaw(self._section(goal_type, "execution_checklist", ()))
     
     def get_day_exercises(self, goal_type: str, day_name: str) -> List[str]:
         """Get exercises for a specific day"""
-        days = self.get_days(goal_type)
-        return days.get(day_name, [])
+        return _thaw(self._section(goal_type, "days", {}).get(day_name, ()))
     
     def map_exercise_name(self, json_exercise_name: str) -> str:
         """Map JSON exercise name to database exercise name"""
-        # Extract the exercise name from the format "1) Exercise Name — 4×5–8"
-        if ")" in json_exercise_name:
-            exercise_part = json_exercise_name.split(")")[1].split("—")[0].strip()
-        else:
-            exercise_part = json_exercise_name
-        
-        # Try to find exact match first
-        if exercise_part in self.exercise_mapping:
-            return self.exercise_mapping[exercise_part]
-        
-        # Try partial matches
-        for json_name, db_name in self.exercise_mapping.items():
-            if json_name.lower() in exercise_part.lower():
-                return db_name
-        
-        # If no match found, return the original exercise part
-        return exercise_part
+        return _map_exercise_name(json_exercise_name)
     
     def convert_to_week_plan_format(self, goal_type: str) -> List[Dict[str, Any]]:
         """Convert JSON plan to week_plan format for database storage"""
-        days = self.get_days(goal_type)
-        weekly_split = self.get_weekly_split(goal_type)
+        # Hand out fresh containers so callers can't mutate the precomputed plan
+        return [{**day, "exercises": list(day["exercises"])} for day in self._week_plans.get(goal_type, ())]
+    
+    def _build_week_plan(self, goal_type: str) -> List[Dict[str, Any]]:
+        """Build the week_plan list for a goal type from the JSON plan"""
+        days = self._section(goal_type, "days", {})
+        weekly_split = self._section(goal_type, "weekly_split", ())
         
         week_plan = []
         
@@ -197,100 +332,25 @@ class WorkoutPlanManager:
     
     def calculate_nutrition_targets(self, goal_type: str, weight_kg: float) -> Dict[str, Any]:
         """Calculate nutrition targets based on user weight"""
-        nutrition = self.get_nutrition(goal_type)
+        return _thaw(self._nutrition_targets(goal_type, weight_kg))
+    
+    def _compute_nutrition_targets(self, goal_type: str, weight_kg: float) -> Mapping[str, Any]:
+        """Nutrition targets for a goal type and weight, frozen for the cache"""
+        nutrition = self._section(goal_type, "nutrition", {})
         if not nutrition:
-            return {}
+            return _freeze({})
         
         # Handle null weight by using default weight
         if weight_kg is None or weight_kg <= 0:
             weight_kg = 70.0  # Default weight in kg
-            print(f"⚠️ User weight not set, using default weight: {weight_kg}kg")
-        
-        targets = {}
-        
-        # Calculate protein
-        if "protein" in nutrition:
-            protein_text = nutrition["protein"]
-            if "1.6-2.2" in protein_text or "1.6–2.2" in protein_text:
-                protein_min = 1.6 * weight_kg
-                protein_max = 2.2 * weight_kg
-                targets["protein"] = {
-                    "min": round(protein_min, 1),
-                    "max": round(protein_max, 1),
-                    "target": round((protein_min + protein_max) / 2, 1)
-                }
-            elif "2.0-2.6" in protein_text or "2.0–2.6" in protein_text:
-                protein_min = 2.0 * weight_kg
-                protein_max = 2.6 * weight_kg
-                targets["protein"] = {
-                    "min": round(protein_min, 1),
-                    "max": round(protein_max, 1),
-                    "target": round((protein_min + protein_max) / 2, 1)
-                }
-            elif "1.6-2.0" in protein_text or "1.6–2.0" in protein_text:
-                protein_min = 1.6 * weight_kg
-                protein_max = 2.0 * weight_kg
-                targets["protein"] = {
-                    "min": round(protein_min, 1),
-                    "max": round(protein_max, 1),
-                    "target": round((protein_min + protein_max) / 2, 1)
-                }
+            logger.warning("User weight not set, using default weight: %.1fkg", weight_kg)
         
-        # Calculate carbs
-        if "carbohydrate" in nutrition:
-            carb_text = nutrition["carbohydrate"]
-            if "3-6" in carb_text or "3–6" in carb_text:
-                carb_min = 3 * weight_kg
-                carb_max = 6 * weight_kg
-                targets["carbohydrate"] = {
-                    "min": round(carb_min, 1),
-                    "max": round(carb_max, 1),
-                    "target": round((carb_min + carb_max) / 2, 1)
-                }
-            elif "2-4" in carb_text or "2–4" in carb_text:
-                carb_min = 2 * weight_kg
-                carb_max = 4 * weight_kg
-                targets["carbohydrate"] = {
-                    "min": round(carb_min, 1),
-                    "max": round(carb_max, 1),
-                    "target": round((carb_min + carb_max) / 2, 1)
-                }
-            elif "5-8" in carb_text or "5–8" in carb_text:
-                carb_min = 5 * weight_kg
-                carb_max = 8 * weight_kg
-                targets["carbohydrate"] = {
-                    "min": round(carb_min, 1),
-                    "max": round(carb_max, 1),
-                    "target": round((carb_min + carb_max) / 2, 1)
-                }
-        
-        # Calculate fat
-        if "fat" in nutrition:
-            fat_text = nutrition["fat"]
-            if "0.6-1.0" in fat_text or "0.6–1.0" in fat_text:
-                fat_min = 0.6 * weight_kg
-                fat_max = 1.0 * weight_kg
-                targets["fat"] = {
-                    "min": round(fat_min, 1),
-                    "max": round(fat_max, 1),
-                    "target": round((fat_min + fat_max) / 2, 1)
-                }
-            elif "0.5-0.8" in fat_text or "0.5–0.8" in fat_text:
-                fat_min = 0.5 * weight_kg
-                fat_max = 0.8 * weight_kg
-                targets["fat"] = {
-                    "min": round(fat_min, 1),
-                    "max": round(fat_max, 1),
-                    "target": round((fat_min + fat_max) / 2, 1)
-                }
-            elif "0.8-1.0" in fat_text or "0.8–1.0" in fat_text:
-                fat_min = 0.8 * weight_kg
-                fat_max = 1.0 * weight_kg
-                targets["fat"] = {
-                    "min": round(fat_min, 1),
-                    "max": round(fat_max, 1),
-                    "target": round((fat_min + fat_max) / 2, 1)
-                }
+        # Protein, carbohydrate and fat targets from the g/kg range in each text
+        targets = {
+            macro: _scaled_macro_range(multipliers, weight_kg)
+            for macro in _MACROS
+            if (multipliers := _macro_multipliers(nutrition.get(macro)))
+        }
         
         # Add supplements with weight-based conversions
         if "supplements" in nutrition:
@@ -300,57 +360,29 @@ class WorkoutPlanManager:
         if "hydration_and_electrolytes" in nutrition:
             targets["hydration"] = self._convert_weight_based_text(nutrition["hydration_and_electrolytes"], weight_kg)
         
-        return targets
+        return _freeze(targets)
     
     def _convert_weight_based_text(self, text_data, weight_kg: float) -> Any:
         """Convert weight-based measurements (g/kg, mg/kg, etc.) to absolute values"""
         if isinstance(text_data, str):
-            return self._convert_single_text(text_data, weight_kg)
-        elif isinstance(text_data, list):
-            return [self._convert_single_text(item, weight_kg) if isinstance(item, str) else item for item in text_data]
-        elif isinstance(text_data, dict):
+            return _convert_single_text(text_data, weight_kg)
+        elif isinstance(text_data, (list, tuple)):
+            # Convert every string in one pass over a joined blob, then split back
+            strings = [item for item in text_data if isinstance(item, str)]
+            if not strings:
+                return list(text_data)
+            converted = iter(_convert_single_text(_BATCH_SEPARATOR.join(strings), weight_kg).split(_BATCH_SEPARATOR))
+            return [next(converted) if isinstance(item, str) else item for item in text_data]
+        elif isinstance(text_data, Mapping):
             converted_dict = {}
             for key, value in text_data.items():
                 if isinstance(value, str):
-                    converted_dict[key] = self._convert_single_text(value, weight_kg)
+                    converted_dict[key] = _convert_single_text(value, weight_kg)
                 else:
                     converted_dict[key] = value
             return converted_dict
         else:
             return text_data
-    
-    def _convert_single_text(self, text: str, weight_kg: float) -> str:
-        """Convert a single text string containing weight-based measurements"""
-        import re
-        
-        # Pattern to match various weight-based measurements
-        patterns = [
-            # g/kg patterns (e.g., "0.5-1.0 g/kg", "1.6–2.2 g/kg")
-            (r'(\d+\.?\d*)-(\d+\.?\d*)\s*g/kg', lambda m: f"{int(float(m.group(1)) * weight_kg)}-{int(float(m.group(2)) * weight_kg)}g"),
-            (r'(\d+\.?\d*)–(\d+\.?\d*)\s*g/kg', lambda m: f"{int(float(m.group(1)) * weight_kg)}-{int(float(m.group(2)) * weight_kg)}g"),
-            (r'(\d+\.?\d*)\s*g/kg', lambda m: f"{int(float(m.group(1)) * weight_kg)}g"),
-            
-            # mg/kg patterns (e.g., "1-3 mg/kg", "1–3 mg/kg")
-            (r'(\d+\.?\d*)-(\d+\.?\d*)\s*mg/kg', lambda m: f"{int(float(m.group(1)) * weight_kg)}-{int(float(m.group(2)) * weight_kg)}mg"),
-            (r'(\d+\.?\d*)–(\d+\.?\d*)\s*mg/kg', lambda m: f"{int(float(m.group(1)) * weight_kg)}-{int(float(m.group(2)) * weight_kg)}mg"),
-            (r'(\d+\.?\d*)\s*mg/kg', lambda m: f"{int(float(m.group(1)) * weight_kg)}mg"),
-            
-            # mg/kg/day patterns
-            (r'(\d+\.?\d*)-(\d+\.?\d*)\s*mg/kg/day', lambda m: f"{int(float(m.group(1)) * weight_kg)}-{int(float(m.group(2)) * weight_kg)}mg/day"),
-            (r'(\d+\.?\d*)–(\d+\.?\d*)\s*mg/kg/day', lambda m: f"{int(float(m.group(1)) * weight_kg)}-{int(float(m.group(2)) * weight_kg)}mg/day"),
-            (r'(\d+\.?\d*)\s*mg/kg/day', lambda m: f"{int(float(m.group(1)) * weight_kg)}mg/day"),
-            
-            # ml/kg patterns (e.g., "30-40 ml/kg")
-            (r'(\d+\.?\d*)-(\d+\.?\d*)\s*ml/kg', lambda m: f"{int(float(m.group(1)) * weight_kg)}-{int(float(m.group(2)) * weight_kg)}ml"),
-            (r'(\d+\.?\d*)–(\d+\.?\d*)\s*ml/kg', lambda m: f"{int(float(m.group(1)) * weight_kg)}-{int(float(m.group(2)) * weight_kg)}ml"),
-            (r'(\d+\.?\d*)\s*ml/kg', lambda m: f"{int(float(m.group(1)) * weight_kg)}ml"),
-        ]
-        
-        converted_text = text
-        for pattern, replacement_func in patterns:
-            converted_text = re.sub(pattern, replacement_func, converted_text)
-        
-        return converted_text
 
 # Global instance
-workout_plan_manager = WorkoutPlanManager() 
\ No newline at end of file
+workout_plan_manager = WorkoutPlanManager.instance() 
\ No newline at end of file
@@ -7,8 +7,16 @@ to generate and store workout plans in your database.
 """
 
 import os
-import json
-from datetime import datetime
+import copy
+import orjson
+import atexit
+import hashlib
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
 from pathlib import Path
 from dotenv import load_dotenv
 import openai
@@ -17,79 +25,11 @@ from supabase import create_client, Client
 # Load environment variables
 load_dotenv(dotenv_path=Path(__file__).parent.parent / '.env')
 
-class IntegratedWorkoutPlanner:
-    """Integrated workout planner with Supabase database storage."""
-    
-    def __init__(self):
-        """Initialize the integrated workout planner."""
-        # OpenAI setup
-        self.api_key = os.getenv("OPENAI_API_KEY")
-        if not self.api_key:
-            raise ValueError("OpenAI API key required. Set OPENAI_API_KEY environment variable.")
-        
-        self.client = openai.OpenAI(api_key=self.api_key)
-        
-        # Supabase setup
-        self.supabase_url = os.getenv("SUPABASE_URL")
-        self.supabase_key = os.getenv("SUPABASE_ANON_KEY")
-        
-        if not self.supabase_url or not self.supabase_key:
-            print("⚠️ Warning: Supabase credentials not found. Plans will be saved locally only.")
-            self.supabase = None
-        else:
-            self.supabase: Client = create_client(self.supabase_url, self.supabase_key)
-            print("✅ Supabase connection established")
-    
-    def generate_and_store_workout_plan(self, request: dict, user_id: str = None) -> dict:
-        """Generate a workout plan and store it in Supabase."""
-        
-        print(f"🎯 Generating workout plan for {request['population']}")
-        print(f"📋 Goals: {', '.join(request['goals'])}")
-        
-        # Generate the workout plan
-        workout_plan = self._generate_workout_plan(request)
-        
-        # Add metadata
-        workout_plan["user_id"] = user_id
-        workout_plan["created_at"] = datetime.now().isoformat()
-        workout_plan["status"] = "active"
-        
-        # Store in Supabase if available
-        if self.supabase:
-            try:
-                print(f"🔍 Attempting to store plan in Supabase...")
-                print(f"🔍 Plan ID: {workout_plan.get('plan_id')}")
-                print(f"🔍 User ID: {workout_plan.get('user_id')}")
-                
-                result = self._store_plan_in_supabase(workout_plan)
-                workout_plan["database_id"] = result.get("id")
-                print(f"✅ Plan stored in Supabase with ID: {result.get('id')}")
-            except Exception as e:
-                print(f"⚠️ Failed to store in Supabase: {e}")
-                print(f"⚠️ Error type: {type(e)}")
-                import traceback
-                print(f"⚠️ Full traceback: {traceback.format_exc()}")
-                print("💾 Plan will be saved locally only")
-        
-        # Always save locally as backup
-        self._save_plan_locally(workout_plan)
-        
-        return workout_plan
-    
-    def _generate_workout_plan(self, request: dict) -> dict:
-        """Generate a workout plan using OpenAI."""
-        
-        # Create a comprehensive, direct prompt
-        prompt = self._create_direct_prompt(request)
-        
-        try:
-            # Make a single API call to generate the complete plan
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """You are an expert fitness trainer and nutritionist. Create comprehensive workout plans in EXACT JSON format matching the workout_plans.json structure.
+logger = logging.getLogger(__name__)
+
+# Kept byte-identical and sent first on every call, so OpenAI's automatic
+# prompt caching can reuse it as a cached prefix
+_SYSTEM_PROMPT = """You are an expert fitness trainer and nutritionist. Create comprehensive workout plans in EXACT JSON format matching the workout_plans.json structure.
 
 CRITICAL: Output ONLY valid JSON with this EXACT structure (matching the provided workout_plans.json format):
 {
@@ -147,58 +87,336 @@ CRITICAL: Output ONLY valid JSON with this EXACT structure (matching the provide
 }
 
 Output ONLY the JSON, no other text."""
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.7,
-                max_tokens=2000
-            )
+
+class _PlanCache:
+    """In-process LRU cache of generated plans, keyed on the canonicalized request."""
+    
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._plans = OrderedDict()
+        # Shared by every worker thread generating plans at once
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def key(request: dict) -> str:
+        """Hash the fields that shape the prompt; list order and letter case don't matter."""
+        canonical = {
+            "population": str(request.get('population', 'general')).lower(),
+            "goals": sorted(str(goal).lower() for goal in request.get('goals', [])),
+            "constraints": sorted(str(item).lower() for item in request.get('constraints', [])),
+            "timeline": str(request.get('timeline', '12_weeks')).lower(),
+            "fitness_level": str(request.get('fitness_level', 'intermediate')).lower(),
+            "preferences": sorted(str(item).lower() for item in request.get('preferences', [])),
+        }
+        return hashlib.blake2b(orjson.dumps(canonical, option=orjson.OPT_SORT_KEYS), digest_size=16).hexdigest()
+    
+    def get(self, key: str):
+        """Return a private copy of the cached plan, or None."""
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is None:
+                return None
+            self._plans.move_to_end(key)
+        # Stored plans are never mutated, so the copy can happen outside the lock
+        return copy.deepcopy(plan)
+    
+    def set(self, key: str, plan: dict):
+        """Store a copy of the plan, evicting the least recently used entry when full."""
+        plan = copy.deepcopy(plan)
+        with self._lock:
+            self._plans[key] = plan
+            self._plans.move_to_end(key)
+            if len(self._plans) > self.max_entries:
+                self._plans.popitem(last=False)
+
+class IntegratedWorkoutPlanner:
+    """Integrated workout planner with Supabase database storage."""
+    
+    # Generated plans shared by every planner in the process, so a repeat of
+    # an earlier request skips the OpenAI round trip
+    _plan_cache = _PlanCache()
+    
+    # Suffix for plan ids so plans finished in the same millisecond (batch or
+    # concurrent requests) still get distinct, increasing ids
+    _plan_counter = itertools.count()
+    
+    # Deferred writes are upserted together once this many rows are queued,
+    # or this many seconds after the first one, whichever comes first
+    flush_threshold = 50
+    flush_interval = 5.0
+    
+    def __init__(self):
+        """Initialize the integrated workout planner."""
+        # OpenAI setup
+        self.api_key = os.getenv("OPENAI_API_KEY")
+        if not self.api_key:
+            raise ValueError("OpenAI API key required. Set OPENAI_API_KEY environment variable.")
+        
+        self.client = openai.OpenAI(api_key=self.api_key)
+        
+        # Supabase setup
+        self.supabase_url = os.getenv("SUPABASE_URL")
+        self.supabase_key = os.getenv("SUPABASE_ANON_KEY")
+        
+        if not self.supabase_url or not self.supabase_key:
+            logger.warning("Supabase credentials not found. Plans will be saved locally only.")
+            self.supabase = None
+        else:
+            self.supabase: Client = create_client(self.supabase_url, self.supabase_key)
+            logger.info("Supabase connection established")
+        
+        # Rows waiting for the next bulk upsert (see queue_plan_for_storage)
+        self._pending_rows = []
+        self._pending_lock = threading.Lock()
+        self._flush_timer = None
+        # Daemon timers die with the process, so write out whatever is left
+        atexit.register(self.close)
+    
+    def generate_and_store_workout_plan(self, request: dict, user_id: str = None,
+                                        defer_storage: bool = False) -> dict:
+        """Generate a workout plan and store it in Supabase.
+        
+        With defer_storage the row is queued for the next bulk upsert instead
+        of being written now, so the returned plan has no database_id.
+        """
+        
+        logger.info("Generating workout plan for %s", request['population'])
+        logger.info("Goals: %s", ', '.join(request['goals']))
+        
+        # Generate the workout plan
+        workout_plan = self._generate_workout_plan(request)
+        
+        # Add metadata
+        workout_plan["user_id"] = user_id
+        workout_plan["status"] = "active"
+        
+        # Store in Supabase if available
+        if self.supabase and defer_storage:
+            self.queue_plan_for_storage(workout_plan)
+        elif self.supabase:
+            try:
+                logger.debug("Storing plan %s for user %s in Supabase", workout_plan.get('plan_id'), workout_plan.get('user_id'))
+                
+                result = self._store_plan_in_supabase(workout_plan)
+                workout_plan["database_id"] = result.get("id")
+                logger.info("Plan stored in Supabase with ID: %s", result.get('id'))
+            except Exception as e:
+                logger.exception("Failed to store plan %s in Supabase; it will be saved locally only", workout_plan.get('plan_id'))
+        
+        # Always save locally as backup
+        self._save_plan_locally(workout_plan)
+        
+        return workout_plan
+    
+    def generate_and_store_workout_plans_batch(self, requests: list, user_id: str = None,
+                                               poll_interval: float = 30.0) -> list:
+        """Generate many plans through the OpenAI Batch API and store them in one insert.
+        
+        For non-interactive work (seeding, re-running evaluations): batch jobs
+        cost half as much but may take up to 24h, so this polls until done.
+        Returns one entry per request, in request order, with None where that
+        request failed.
+        """
+        
+        lines = [
+            orjson.dumps({
+                "custom_id": str(index),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._completion_body(request)
+            })
+            for index, request in enumerate(requests)
+        ]
+        batch_file = self.client.files.create(
+            file=("workout_plan_requests.jsonl", b"\n".join(lines)),
+            purpose="batch"
+        )
+        batch = self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        logger.info("Submitted batch %s with %s plan requests", batch.id, len(requests))
+        
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            time.sleep(poll_interval)
+            batch = self.client.batches.retrieve(batch.id)
+        
+        if batch.status != "completed" or not batch.output_file_id:
+            raise RuntimeError(f"Batch {batch.id} finished with status {batch.status}")
+        
+        # Stream the results line by line instead of loading the whole file
+        plans_by_index = {}
+        with self.client.files.with_streaming_response.content(batch.output_file_id) as output:
+            for line in output.iter_lines():
+                if not line:
+                    continue
+                result = orjson.loads(line)
+                index = int(result["custom_id"])
+                response = result.get("response") or {}
+                if result.get("error") or response.get("status_code") != 200:
+                    logger.warning("Batch request %s failed: %s", index, result.get('error') or response.get('status_code'))
+                    continue
+                try:
+                    content = response["body"]["choices"][0]["message"]["content"]
+                    if content is None:
+                        # e.g. a refusal; there is no plan text to parse
+                        raise ValueError("response has no message content")
+                    workout_plan = self._parse_plan_content(content)
+                except (KeyError, IndexError, TypeError, AttributeError, ValueError) as e:
+                    logger.warning("Batch request %s returned an unusable plan: %s", index, e)
+                    continue
+                self._plan_cache.set(self._plan_cache.key(requests[index]), workout_plan)
+                plans_by_index[index] = workout_plan
+        
+        results = [None] * len(requests)
+        for index in sorted(plans_by_index):
+            workout_plan = self._finish_generated_plan(plans_by_index[index])
+            workout_plan["user_id"] = user_id
+            workout_plan["status"] = "active"
+            results[index] = workout_plan
+        workout_plans = [workout_plan for workout_plan in results if workout_plan is not None]
+        
+        if self.supabase and workout_plans:
+            try:
+                rows = self._upsert_rows([self._supabase_record(workout_plan) for workout_plan in workout_plans])
+                for workout_plan, row in zip(workout_plans, rows):
+                    workout_plan["database_id"] = row.get("id")
+                logger.info("Stored %s batch plans in Supabase", len(rows))
+            except Exception as e:
+                logger.exception("Failed to store batch plans in Supabase; they will be saved locally only")
+        
+        for workout_plan in workout_plans:
+            self._save_plan_locally(workout_plan)
+        
+        return results
+    
+    def _generate_workout_plan(self, request: dict) -> dict:
+        """Generate a workout plan using OpenAI."""
+        
+        cache_key = self._plan_cache.key(request)
+        workout_plan = self._plan_cache.get(cache_key)
+        if workout_plan is not None:
+            logger.info("Reusing cached workout plan for an identical request")
+            return self._finish_generated_plan(workout_plan)
+        
+        try:
+            # Make a single API call to generate the complete plan, streamed so
+            # the JSON is scanned while it arrives
+            stream = self.client.chat.completions.create(**self._completion_body(request), stream=True)
             
             # Extract the response content
-            content = response.choices[0].message.content.strip()
+            content = self._read_streamed_plan(stream)
+            workout_plan = self._parse_plan_content(content)
+            self._plan_cache.set(cache_key, workout_plan)
             
-            # Try to parse the JSON
-            try:
-                # Find JSON in the response
-                start_idx = content.find('{')
-                end_idx = content.rfind('}') + 1
-                
-                if start_idx != -1 and end_idx != 0:
-                    json_str = content[start_idx:end_idx]
-                    workout_plan = json.loads(json_str)
-                    
-                    # Add metadata
-                    workout_plan["plan_id"] = f"integrated_workout_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                    workout_plan["generation_method"] = "Integrated_OpenAI_Supabase"
-                    
-                    print("✅ Workout plan generated successfully!")
-                    return workout_plan
-                else:
-                    raise ValueError("No JSON found in response")
-                    
-            except json.JSONDecodeError as e:
-                print(f"❌ JSON parsing failed: {e}")
-                print(f"Raw response: {content[:200]}...")
-                raise
+            logger.info("Workout plan generated successfully!")
+            return self._finish_generated_plan(workout_plan)
                 
         except Exception as e:
-            print(f"❌ Error generating workout plan: {e}")
+            logger.error("Error generating workout plan: %s", e)
             raise
     
-    def _store_plan_in_supabase(self, workout_plan: dict) -> dict:
-        """Store the workout plan in Supabase database."""
+    def _completion_body(self, request: dict) -> dict:
+        """Chat completion parameters for one plan request (shared by live and batch calls)."""
+        
+        return {
+            "model": "gpt-4o-mini",
+            "messages": [
+                {
+                    "role": "system",
+                    "content": _SYSTEM_PROMPT
+                },
+                {
+                    "role": "user",
+                    "content": self._create_direct_prompt(request)
+                }
+            ],
+            "temperature": 0.7,
+            "max_tokens": 2000,
+            # Enforces a syntactically valid JSON object
+            "response_format": {"type": "json_object"}
+        }
+    
+    def _read_streamed_plan(self, stream) -> str:
+        """Collect streamed message content, stopping once the top-level JSON object closes."""
         
-        if not self.supabase:
-            raise ValueError("Supabase not initialized")
+        parts = []
+        depth = 0
+        in_string = False
+        escaped = False
+        try:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                parts.append(delta)
+                
+                # Track brace depth outside of strings so we know when the plan is complete
+                for position, char in enumerate(delta):
+                    if in_string:
+                        if escaped:
+                            escaped = False
+                        elif char == '\\':
+                            escaped = True
+                        elif char == '"':
+                            in_string = False
+                    elif char == '"':
+                        in_string = depth > 0
+                    elif char == '{':
+                        depth += 1
+                    elif char == '}' and depth > 0:
+                        depth -= 1
+                        if depth == 0:
+                            # Anything after the plan is ignored, so stop reading
+                            parts[-1] = delta[:position + 1]
+                            return "".join(parts)
+        finally:
+            stream.close()
+        
+        return "".join(parts)
+    
+    def _parse_plan_content(self, content: str) -> dict:
+        """Parse the JSON plan out of a completion's message content."""
+        
+        content = content.strip()
+        
+        # Try to parse the JSON
+        try:
+            # Find JSON in the response
+            start_idx = content.find('{')
+            end_idx = content.rfind('}') + 1
+            
+            if start_idx != -1 and end_idx != 0:
+                json_str = content[start_idx:end_idx]
+                return orjson.loads(json_str)
+            else:
+                raise ValueError("No JSON found in response")
+                
+        except orjson.JSONDecodeError as e:
+            logger.error("JSON parsing failed: %s; raw response: %.200s...", e, content)
+            raise
+    
+    def _finish_generated_plan(self, workout_plan: dict) -> dict:
+        """Stamp a freshly generated (or cached) plan with its own id, creation time and method."""
+        
+        # Add metadata
+        ts = time.time()
+        workout_plan["plan_id"] = f"integrated_workout_{int(ts * 1000):013d}_{next(self._plan_counter):06d}"
+        workout_plan["created_at"] = datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+        workout_plan["generation_method"] = "Integrated_OpenAI_Supabase"
+        return workout_plan
+    
+    def _supabase_record(self, workout_plan: dict) -> dict:
+        """Row for the workout_plans table built from a generated plan."""
         
         # Prepare the data for Supabase - only use fields that exist in the table
         # Based on our testing, the table has: id, plan_id, plan_data, metadata, created_at, updated_at, is_active
         supabase_data = {
             "plan_id": workout_plan.get("plan_id"),
-            "plan_data": json.dumps(workout_plan),
+            "plan_data": orjson.dumps(workout_plan).decode(),
             "is_active": True
         }
         
@@ -218,37 +436,111 @@ Output ONLY the JSON, no other text."""
             metadata["generation_method"] = workout_plan.get("generation_method")
         
         if metadata:
-            supabase_data["metadata"] = json.dumps(metadata)
+            supabase_data["metadata"] = orjson.dumps(metadata).decode()
         
-        print(f"🔍 Supabase data prepared: {list(supabase_data.keys())}")
-        print(f"🔍 Plan ID: {supabase_data['plan_id']}")
-        if 'metadata' in supabase_data:
-            metadata_obj = json.loads(supabase_data['metadata'])
-            if 'user_id' in metadata_obj:
-                print(f"🔍 User ID: {metadata_obj['user_id']}")
+        return supabase_data
+    
+    def queue_plan_for_storage(self, workout_plan: dict):
+        """Buffer a plan's row for the next bulk upsert instead of writing it now."""
         
-        # Insert into Supabase
-        print(f"🔍 Attempting Supabase insert...")
-        result = self.supabase.table("workout_plans").insert(supabase_data).execute()
+        with self._pending_lock:
+            self._pending_rows.append(self._supabase_record(workout_plan))
+            full = len(self._pending_rows) >= self.flush_threshold
+            if not full:
+                self._schedule_flush()
+        
+        if full:
+            self.flush_pending(force=True)
+    
+    def _schedule_flush(self):
+        """Start the flush timer unless one is already running; call with _pending_lock held."""
+        
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.flush_interval, self._flush_on_timer)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+    
+    def _flush_on_timer(self):
+        """Timer callback; a failed flush has already re-queued its rows and rescheduled."""
+        
+        try:
+            self.flush_pending(force=True)
+        except Exception:
+            pass
+    
+    def flush_pending(self, force: bool = False) -> list:
+        """Upsert the queued rows in one request; without force, only once the threshold is reached."""
+        
+        with self._pending_lock:
+            if not self._pending_rows or (not force and len(self._pending_rows) < self.flush_threshold):
+                return []
+            rows, self._pending_rows = self._pending_rows, []
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
         
-        print(f"🔍 Supabase result: {result}")
-        print(f"🔍 Result data: {result.data}")
+        try:
+            stored = self._upsert_rows(rows)
+        except Exception as e:
+            # Put the rows back and retry them on the next timer tick
+            with self._pending_lock:
+                self._pending_rows[:0] = rows
+                self._schedule_flush()
+            logger.warning("Failed to flush %s queued plans to Supabase: %s", len(rows), e)
+            raise
+        
+        logger.info("Flushed %s queued plans to Supabase", len(stored))
+        return stored
+    
+    def close(self):
+        """Stop the flush timer and write out any rows still queued."""
+        
+        with self._pending_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._pending_rows:
+                return
+        
+        try:
+            self.flush_pending(force=True)
+        except Exception:
+            logger.error("Dropping %s queued plans that could not be written at shutdown", len(self._pending_rows))
+    
+    def _upsert_rows(self, rows: list) -> list:
+        """Write workout_plans rows in one request; rows with an existing plan_id are updated."""
+        
+        result = self.supabase.table("workout_plans").upsert(rows, on_conflict="plan_id").execute()
+        return result.data or []
+    
+    def _store_plan_in_supabase(self, workout_plan: dict) -> dict:
+        """Store the workout plan in Supabase database."""
+        
+        if not self.supabase:
+            raise ValueError("Supabase not initialized")
+        
+        supabase_data = self._supabase_record(workout_plan)
+        
+        logger.debug("Supabase row prepared for plan %s: %s", supabase_data['plan_id'], list(supabase_data))
+        
+        # Insert into Supabase
+        rows = self._upsert_rows([supabase_data])
+        logger.debug("Supabase returned %d rows", len(rows))
         
-        if result.data:
-            print(f"✅ Supabase insert successful!")
-            return result.data[0]
+        if rows:
+            return rows[0]
         else:
-            print(f"❌ Supabase insert failed - no data returned")
+            logger.error("Supabase insert failed - no data returned")
             raise ValueError("Failed to insert into Supabase")
     
     def _save_plan_locally(self, workout_plan: dict):
         """Save the workout plan locally as a backup."""
         
         filename = f"backup_{workout_plan.get('plan_id', 'unknown')}.json"
-        with open(filename, 'w') as f:
-            json.dump(workout_plan, f, indent=2)
+        with open(filename, 'wb') as f:
+            f.write(orjson.dumps(workout_plan, option=orjson.OPT_INDENT_2))
         
-        print(f"💾 Plan saved locally as backup: {filename}")
+        logger.info("Plan saved locally as backup: %s", filename)
     
     def _create_direct_prompt(self, request: dict) -> str:
         """Create a direct, comprehensive prompt for workout plan generation."""
@@ -298,7 +590,7 @@ Output the complete workout plan in the exact JSON format specified above."""
         """Get all workout plans for a specific user."""
         
         if not self.supabase:
-            print("⚠️ Supabase not available")
+            logger.warning("Supabase not available")
             return []
         
         try:
@@ -310,30 +602,30 @@ Output the complete workout plan in the exact JSON format specified above."""
                 for plan in result.data:
                     if plan.get('metadata'):
                         try:
-                            metadata = json.loads(plan['metadata'])
+                            metadata = orjson.loads(plan['metadata'])
                             if metadata.get('user_id') == user_id:
                                 user_plans.append(plan)
-                        except (json.JSONDecodeError, TypeError):
+                        except (orjson.JSONDecodeError, TypeError):
                             continue
                 return user_plans
             else:
                 return []
         except Exception as e:
-            print(f"❌ Error fetching user plans: {e}")
+            logger.error("Error fetching user plans: %s", e)
             return []
     
     def update_plan_status(self, plan_id: str, status: str):
         """Update the status of a workout plan."""
         
         if not self.supabase:
-            print("⚠️ Supabase not available")
+            logger.warning("Supabase not available")
             return
         
         try:
             result = self.supabase.table("workout_plans").update({"status": status}).eq("plan_id", plan_id).execute()
-            print(f"✅ Plan {plan_id} status updated to {status}")
+            logger.info("Plan %s status updated to %s", plan_id, status)
         except Exception as e:
-            print(f"❌ Error updating plan status: {e}")
+            logger.error("Error updating plan status: %s", e)
 
 # Test the integrated planner
 def test_integrated_planner():
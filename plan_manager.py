@@ -4,13 +4,22 @@ Simple Health Plan Manager
 Interact with the health-plan-agent backend API
 """
 
-import requests
+import asyncio
+import httpx
 import json
 import sys
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 BASE_URL = "https://web-production-f15a06.up.railway.app"
 
+# Plan generation waits on the model, so allow long reads
+_TIMEOUT = httpx.Timeout(120.0, connect=10.0)
+_LIMITS = httpx.Limits(max_keepalive_connections=20)
+
+# One pooled client for the blocking helpers, so repeated calls reuse the
+# TCP+TLS connection instead of handshaking every time
+_client = httpx.Client(base_url=BASE_URL, timeout=_TIMEOUT, limits=_LIMITS)
+
 def generate_plan(population: str, goals: list, constraints: list = None, 
                  timeline: str = "12_weeks", fitness_level: str = "beginner") -> Dict[str, Any]:
     """Generate a new health plan"""
@@ -23,29 +32,40 @@ def generate_plan(population: str, goals: list, constraints: list = None,
         "fitness_level": fitness_level
     }
     
-    response = requests.post(f"{BASE_URL}/api/v1/plans/generate", json=payload)
+    response = _client.post("/api/v1/plans/generate", json=payload)
     response.raise_for_status()
     
     return response.json()
 
 def list_plans() -> Dict[str, Any]:
     """Get all available plans"""
-    response = requests.get(f"{BASE_URL}/api/v1/plans/discover")
+    response = _client.get("/api/v1/plans/discover")
     response.raise_for_status()
     return response.json()
 
 def get_plan(plan_id: str) -> Dict[str, Any]:
     """Get a specific plan by ID"""
-    response = requests.get(f"{BASE_URL}/api/v1/plans/{plan_id}")
+    response = _client.get(f"/api/v1/plans/{plan_id}")
     response.raise_for_status()
     return response.json()
 
+async def get_plan_async(client: httpx.AsyncClient, plan_id: str) -> Dict[str, Any]:
+    """Get a specific plan by ID without blocking the event loop"""
+    response = await client.get(f"/api/v1/plans/{plan_id}")
+    response.raise_for_status()
+    return response.json()
+
+async def get_plans(plan_ids: List[str]) -> List[Dict[str, Any]]:
+    """Get several plans concurrently over one pooled async client"""
+    async with httpx.AsyncClient(base_url=BASE_URL, timeout=_TIMEOUT, limits=_LIMITS) as client:
+        return await asyncio.gather(*(get_plan_async(client, plan_id) for plan_id in plan_ids))
+
 def main():
     """Simple CLI interface"""
     if len(sys.argv) < 2:
         print("Usage:")
         print("  python plan_manager.py list                    # List all plans")
-        print("  python plan_manager.py get <plan_id>          # Get specific plan")
+        print("  python plan_manager.py get <plan_id>...       # Get specific plan(s)")
         print("  python plan_manager.py generate <population> <goals...>  # Generate new plan")
         return
     
@@ -61,11 +81,15 @@ def main():
         
         elif command == "get":
             if len(sys.argv) < 3:
-                print("Usage: python plan_manager.py get <plan_id>")
+                print("Usage: python plan_manager.py get <plan_id> [<plan_id>...]")
                 return
-            plan_id = sys.argv[2]
-            result = get_plan(plan_id)
-            print(json.dumps(result, indent=2))
+            plan_ids = sys.argv[2:]
+            if len(plan_ids) == 1:
+                result = get_plan(plan_ids[0])
+                print(json.dumps(result, indent=2))
+            else:
+                results = asyncio.run(get_plans(plan_ids))
+                print(json.dumps(dict(zip(plan_ids, results)), indent=2))
         
         elif command == "generate":
             if len(sys.argv) < 4:
@@ -80,7 +104,7 @@ def main():
         else:
             print(f"Unknown command: {command}")
     
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         print(f"API Error: {e}")
     except Exception as e:
         print(f"Error: {e}")
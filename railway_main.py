@@ -9,9 +9,15 @@ from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import os
 import sys
-import asyncio
+import logging
+from functools import partial
 from pathlib import Path
 
+from anyio import to_thread
+
+# Route planner logging to stdout so Railway captures it
+logging.basicConfig(level=logging.INFO, stream=sys.stdout)
+
 # Import the new simplified workout planners
 try:
     print("🔍 Attempting to import IntegratedWorkoutPlanner...")
@@ -31,10 +37,15 @@ except ImportError as e:
     print(f"❌ Full traceback: {traceback.format_exc()}")
     PLANNERS_AVAILABLE = False
 
+# The planners' OpenAI and Supabase clients are synchronous, so every call into
+# them is pushed onto AnyIO's worker threads; this sizes that shared pool
+WORKER_THREADS = int(os.getenv("WORKER_THREADS", "64"))
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
     print("🚀 Starting Health Plan Agent Backend...")
+    to_thread.current_default_thread_limiter().total_tokens = WORKER_THREADS
     
     # Initialize services if available
     if PLANNERS_AVAILABLE:
@@ -63,6 +74,9 @@ async def lifespan(app: FastAPI):
     yield
     
     print("🛑 Shutting down Health Plan Agent Backend...")
+    if app.state.integrated_planner:
+        # Write out plans still waiting for a deferred bulk upsert
+        await to_thread.run_sync(app.state.integrated_planner.close)
 
 # Create FastAPI app
 app = FastAPI(
@@ -127,10 +141,11 @@ async def generate_health_plan(request: dict):
         integrated_planner = app.state.integrated_planner
         
         # Use the integrated planner to generate and store the plan
-        workout_plan = integrated_planner.generate_and_store_workout_plan(
+        workout_plan = await to_thread.run_sync(partial(
+            integrated_planner.generate_and_store_workout_plan,
             planner_request, 
             user_id=user_id
-        )
+        ))
         
         print(f"✅ Plan generated successfully!")
         print(f"📊 Plan ID: {workout_plan.get('plan_id')}")
@@ -186,19 +201,21 @@ async def get_system_plans():
             }
         
         # Get all plans that start with "migrated_" (our system plans)
-        import json
-        result = integrated_planner.supabase.table("workout_plans").select("*").execute()
+        import orjson
+        result = await to_thread.run_sync(
+            integrated_planner.supabase.table("workout_plans").select("*").execute
+        )
         
         if result.data:
             system_plans = []
             for plan in result.data:
                 if plan.get('metadata'):
                     try:
-                        metadata = json.loads(plan['metadata'])
+                        metadata = orjson.loads(plan['metadata'])
                         user_id = metadata.get('user_id', '')
                         if user_id.startswith('migrated_'):
                             system_plans.append(plan)
-                    except (json.JSONDecodeError, TypeError):
+                    except (orjson.JSONDecodeError, TypeError):
                         continue
             
             return {
@@ -236,7 +253,7 @@ async def get_user_plans(user_id: str):
             raise HTTPException(status_code=503, detail="Integrated planner not available")
         
         integrated_planner = app.state.integrated_planner
-        user_plans = integrated_planner.get_user_plans(user_id)
+        user_plans = await to_thread.run_sync(integrated_planner.get_user_plans, user_id)
         
         return {
             "success": True,
@@ -285,7 +302,7 @@ async def test_supabase_storage():
         print("🔍 Testing Supabase storage with simple plan...")
         
         # Try to store the test plan
-        result = integrated_planner._store_plan_in_supabase(test_plan)
+        result = await to_thread.run_sync(integrated_planner._store_plan_in_supabase, test_plan)
         
         return {
             "success": True,
@@ -370,7 +387,7 @@ async def migrate_existing_plans():
                 }
                 
                 # Store in database
-                result = integrated_planner._store_plan_in_supabase(workout_plan)
+                result = await to_thread.run_sync(integrated_planner._store_plan_in_supabase, workout_plan)
                 
                 if result:
                     successful_migrations += 1
@@ -439,7 +456,9 @@ async def test_supabase():
         
         # Try to query the workout_plans table
         try:
-            result = integrated_planner.supabase.table("workout_plans").select("*").limit(1).execute()
+            result = await to_thread.run_sync(
+                integrated_planner.supabase.table("workout_plans").select("*").limit(1).execute
+            )
             print(f"✅ Supabase connection successful")
             print(f"📊 Table query result: {len(result.data)} rows")
             
@@ -503,19 +522,20 @@ async def test_openai():
                 }
             }
         
-        # Initialize OpenAI client
-        client = openai.OpenAI(api_key=api_key)
+        # Reuse the planner's client (and its connection pool) when available
+        planner = app.state.integrated_planner
+        client = planner.client if planner else openai.OpenAI(api_key=api_key)
         
         # Make a simple test request
         print("📡 Making test request to OpenAI...")
         
-        response = await asyncio.to_thread(
+        response = await to_thread.run_sync(partial(
             client.chat.completions.create,
             model=model,
             messages=[{"role": "user", "content": "Give me a random word."}],
             max_tokens=10,
             temperature=0.7
-        )
+        ))
         
         result = response.choices[0].message.content.strip()
         print(f"✅ OpenAI API call successful!")
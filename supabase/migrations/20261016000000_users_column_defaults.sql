@@ -0,0 +1,10 @@
+-- Column defaults for users, matching the server_default values in app/models.py.
+-- Base.metadata.create_all() only applies these to freshly created tables.
+
+ALTER TABLE users ALTER COLUMN email_verified SET DEFAULT false;
+ALTER TABLE users ALTER COLUMN age SET DEFAULT 25;
+ALTER TABLE users ALTER COLUMN weight SET DEFAULT 70.0;
+ALTER TABLE users ALTER COLUMN height SET DEFAULT 170.0;
+ALTER TABLE users ALTER COLUMN fitness_goals SET DEFAULT 'Building Muscle';
+ALTER TABLE users ALTER COLUMN fitness_goal_type SET DEFAULT 'building_muscle';
+ALTER TABLE users ALTER COLUMN injuries_limitations SET DEFAULT 'None';
@@ -0,0 +1,13 @@
+-- One exercise record per (user_id, exercise_name), matching the
+-- UniqueConstraint on ExerciseRecord in app/models.py. Workout plan
+-- regeneration relies on it for INSERT ... ON CONFLICT DO NOTHING.
+
+-- Keep the oldest record when duplicates already exist
+DELETE FROM exercise_records a
+USING exercise_records b
+WHERE a.user_id = b.user_id
+  AND a.exercise_name = b.exercise_name
+  AND a.id > b.id;
+
+ALTER TABLE exercise_records
+    ADD CONSTRAINT uq_exercise_records_user_exercise UNIQUE (user_id, exercise_name);
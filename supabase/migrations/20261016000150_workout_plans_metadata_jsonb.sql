@@ -0,0 +1,22 @@
+-- Store workout plan metadata as JSONB so containment filters (@>) and the
+-- GIN index in the following migration can be used, and index the
+-- active-plans listing order used by WorkoutPlanService.get_all_plans.
+-- plan_data is never filtered on and keeps its current type.
+
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1
+        FROM information_schema.columns
+        WHERE table_schema = 'public'
+          AND table_name = 'workout_plans'
+          AND column_name = 'metadata'
+          AND data_type = 'json'
+    ) THEN
+        ALTER TABLE workout_plans ALTER COLUMN metadata TYPE jsonb USING metadata::jsonb;
+    END IF;
+END $$;
+
+CREATE INDEX IF NOT EXISTS workout_plans_active_created
+    ON workout_plans (created_at DESC)
+    WHERE is_active;
@@ -0,0 +1,12 @@
+-- Indexes for metadata filters on active workout plans.
+-- WorkoutPlanService filters metadata with JSONB containment (@>), which the
+-- jsonb_path_ops GIN index serves. The expression index covers callers that
+-- still compare metadata->>'category' directly.
+
+CREATE INDEX IF NOT EXISTS workout_plans_metadata_path_ops
+    ON workout_plans USING gin (metadata jsonb_path_ops)
+    WHERE is_active;
+
+CREATE INDEX IF NOT EXISTS workout_plans_metadata_category
+    ON workout_plans ((metadata->>'category'))
+    WHERE is_active;
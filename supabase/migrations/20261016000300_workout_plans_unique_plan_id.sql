@@ -0,0 +1,14 @@
+-- One workout_plans row per plan_id. IntegratedWorkoutPlanner writes plans
+-- with a bulk UPSERT ... ON CONFLICT (plan_id), which needs this constraint.
+
+-- Older plan_ids were per-second timestamps, so existing duplicates are
+-- mostly distinct plans that collided. Keep them all: the oldest row keeps
+-- its plan_id and later ones get their row id appended.
+UPDATE workout_plans a
+SET plan_id = a.plan_id || '_' || a.id::text
+FROM workout_plans b
+WHERE a.plan_id = b.plan_id
+  AND a.id > b.id;
+
+ALTER TABLE workout_plans
+    ADD CONSTRAINT uq_workout_plans_plan_id UNIQUE (plan_id);